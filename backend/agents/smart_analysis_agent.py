@@ -19,7 +19,7 @@ from git import Repo
 
 from tools.base_tool import BaseTool, ToolResult, AnalysisContext
 from core.tool_registry import get_tool_registry
-from core.context_analyzer import ContextAnalyzer
+from core.context_analyzer import context_analyzer
 from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -39,7 +39,7 @@ class SmartAnalysisAgent:
             temperature=0,
             api_key=openai_api_key
         )
-        self.context_analyzer = ContextAnalyzer()
+        self.context_analyzer = context_analyzer
         self.temp_dir = None
         
         # Execution strategy configuration
@@ -73,7 +73,7 @@ class SmartAnalysisAgent:
                 "current_step": "Analyzing context and creating analysis plan..."
             }
             
-            context = self.context_analyzer.analyze_context(
+            context = await self.context_analyzer.analyze_context(
                 context_text, repository_url, {
                     **(additional_params or {}),
                     'original_context': context_text  # Store original context for AI insights decision
@@ -115,7 +115,7 @@ class SmartAnalysisAgent:
             registry = await get_tool_registry()
             
             # Parse the original intent to get secondary intents
-            parsed_intent = self.context_analyzer._parse_intent(context_text)
+            parsed_intent = await self.context_analyzer._parse_intent(context_text)
             logger.info(f"Parsed intent - Actions: {[(a.intent, a.priority) for a in parsed_intent.actions]}")
             
             # Find tools for all identified actions
@@ -606,8 +606,7 @@ class SmartAnalysisAgent:
                 combined_results[tool_name] = result.results
         
         # Get the parsed intent from context analyzer
-        context_analyzer = ContextAnalyzer()
-        parsed_intent = context_analyzer._parse_intent(context.additional_params.get('original_context', ''))
+        parsed_intent = await self.context_analyzer._parse_intent(context.additional_params.get('original_context', ''))
         
         # Determine mixed intent scenario
         has_multiple_intents = len(parsed_intent.actions) > 1
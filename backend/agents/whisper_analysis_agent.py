@@ -1,15 +1,30 @@
 # Whisper Analysis Agent - Comprehensive Codebase Analysis
 
 import os
+import sys
 import json
 import tempfile
 import subprocess
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, AsyncIterator
 from pathlib import Path
 from collections import defaultdict, Counter
 import asyncio
 import re
+import time
+import contextlib
+import contextvars
+import uuid
+import threading
+import fnmatch
+import hashlib
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from git import Repo, GitCommandError
 from langchain_openai import ChatOpenAI
@@ -18,8 +33,89 @@ from langchain.tools import tool
 from langgraph.graph import StateGraph, END
 from typing import TypedDict
 
+from utils.file_utils import count_lines_in_file
+
 logger = logging.getLogger(__name__)
 
+# Queue of the analyze_repository run whose workflow is executing in the current context.
+# Set inside each run's workflow task, so concurrent runs on one agent never share it.
+_progress_queue: contextvars.ContextVar[Optional[asyncio.Queue]] = contextvars.ContextVar(
+    "whisper_progress_queue", default=None
+)
+
+
+def _json_loads(data: bytes) -> Any:
+    """Parse JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj: Any) -> str:
+    """Serialize to compact JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False)
+
+
+def _by_count(counts: Dict[str, int]) -> Dict[str, int]:
+    """Order a count mapping from most to least common for presentation."""
+    return dict(sorted(counts.items(), key=lambda item: item[1], reverse=True))
+
+
+def _with_ordered_counts(results: Dict[str, Any]) -> Dict[str, Any]:
+    """Order the extension and language counts of a finished analysis for the user."""
+    if results.get("file_structure"):
+        results["file_structure"] = {
+            **results["file_structure"],
+            "file_types": _by_count(results["file_structure"]["file_types"])
+        }
+    if results.get("language_analysis"):
+        results["language_analysis"] = {
+            **results["language_analysis"],
+            "languages": _by_count(results["language_analysis"]["languages"])
+        }
+    return results
+
+
+def _ext(name: str) -> str:
+    """Lower-cased extension of a file name, matching Path(name).suffix semantics."""
+    i = name.rfind('.')
+    return name[i:].lower() if 0 < i < len(name) - 1 else ''
+
+
+# Static part of the architectural-insight prompt; JSON sections are compact to save tokens
+PROMPT_TEMPLATE = """As a senior software architect, analyze this codebase structure and provide comprehensive insights:
+
+Repository Analysis:
+- Primary Language: {primary_language}
+- Languages Used: {languages}
+- Frameworks: {frameworks}
+- Total Files: {total_files}
+- Total Lines of Code: {total_lines}
+
+Directory Structure:
+{main_directories}
+
+Main Components:
+{main_components}
+
+Architectural Patterns Detected:
+{patterns}
+
+Dependencies:
+{dependencies}
+
+Please provide:
+1. **Architecture Overview**: High-level description of the system architecture
+2. **Technology Stack Assessment**: Analysis of technology choices and their suitability
+3. **Code Organization**: How well the code is structured and organized
+4. **Scalability Considerations**: Potential scalability strengths and challenges
+5. **Maintainability**: Code maintainability and technical debt indicators
+6. **Recommendations**: Specific suggestions for improvement
+
+Format your response as clear, actionable insights that would be valuable for developers and stakeholders."""
+
 # Analysis State for LangGraph
 class WhisperAnalysisState(TypedDict):
     repository_url: str
@@ -36,16 +132,103 @@ class WhisperAnalysisState(TypedDict):
     current_step: str
     errors: List[str]
 
+class DirNode:
+    """Directory trie node; path segments and file names are interned and shared."""
+    __slots__ = ('children', 'files')
+
+    def __init__(self):
+        self.children: Dict[str, 'DirNode'] = {}
+        self.files: List[str] = []
+
+    def flatten(self) -> Dict[str, List[str]]:
+        """Flatten to {relative_dir: [file names]} in top-down order, omitting empty directories."""
+        flat = {}
+        stack = [('root', self)]
+        while stack:
+            rel_dir, node = stack.pop()
+            if node.files:
+                flat[rel_dir] = list(node.files)
+            prefix = '' if rel_dir == 'root' else rel_dir + '/'
+            stack.extend((prefix + name, child) for name, child in reversed(node.children.items()))
+        return flat
+
 class WhisperAnalysisAgent:
-    def __init__(self, openai_api_key: str):
+    # Skip common directories that don't need analysis
+    SKIP_DIRS = frozenset({
+        '.git', '__pycache__', 'node_modules', '.next', 'dist', 'build',
+        '.vscode', '.idea', 'coverage', '.pytest_cache', 'venv', 'env'
+    })
+
+    # Dot-files that are still worth reporting
+    ALLOWED_DOTFILES = frozenset({'.env.example', '.gitignore', '.dockerignore'})
+
+    # Extensions whose lines are counted
+    CODE_EXTS = frozenset({
+        '.py', '.js', '.jsx', '.ts', '.tsx', '.java', '.cpp', '.c', '.go', '.rs'
+    })
+
+    # Code files outside this size range are not opened for line counting
+    MAX_LINE_COUNT_BYTES = 2 * 1024 * 1024
+
+    # Minified and bundled code files would only inflate the line count
+    # (lockfiles never reach this check: .json is not in CODE_EXTS)
+    GENERATED_FILE_RE = re.compile('|'.join(
+        fnmatch.translate(pattern) for pattern in ('*.min.js', '*.bundle.js')
+    ))
+
+    # Language detection by file extension
+    LANG_MAP = {
+        '.py': 'Python', '.js': 'JavaScript', '.ts': 'TypeScript',
+        '.jsx': 'React JSX', '.tsx': 'TypeScript React',
+        '.java': 'Java', '.cpp': 'C++', '.c': 'C',
+        '.go': 'Go', '.rs': 'Rust', '.php': 'PHP',
+        '.rb': 'Ruby', '.swift': 'Swift', '.kt': 'Kotlin',
+        '.cs': 'C#', '.scala': 'Scala', '.clj': 'Clojure'
+    }
+
+    # Directory and file names that signal architectural patterns
+    MVC_DIRS = frozenset({'models', 'views', 'controllers'})
+    NESTED_MVC_DIRS = frozenset({'app/models', 'app/views', 'app/controllers'})
+    MICROSERVICE_DIRS = frozenset({'kubernetes', 'k8s'})
+    CLEAN_ARCH_DIRS = frozenset({'domain', 'infrastructure', 'application', 'interfaces'})
+    LAYERED_DIRS = frozenset({'services', 'repositories', 'entities', 'dto'})
+    API_SPEC_FILES = frozenset({'openapi.yml', 'swagger.yml', 'api.yml'})
+
+    # Keywords in top-level names that suggest an event-driven design
+    EVENT_KEYWORDS = frozenset({'event', 'queue', 'pub', 'sub', 'kafka', 'rabbitmq'})
+    # All keywords as one alternation so each name is matched in a single pass
+    EVENT_KEYWORD_RE = re.compile('|'.join(map(re.escape, sorted(EVENT_KEYWORDS))))
+
+    # Package name at the start of a requirements.txt line (stops at extras/specifiers)
+    REQUIREMENT_RE = re.compile(rb'^\s*([A-Za-z0-9][A-Za-z0-9_.\-]*)')
+
+    # Single-line "require module version" directives in go.mod
+    GO_REQUIRE_RE = re.compile(rb'^\s*require\s+([^\s(]+)', re.M)
+
+    # Maven artifact declarations in pom.xml
+    POM_ARTIFACT_RE = re.compile(r'<artifactId>([^<]+)</artifactId>')
+
+    # On-disk cache of LLM responses, keyed by model and prompt hash
+    LLM_CACHE_DIR = Path.home() / '.cache' / 'whisper' / 'llm'
+
+    def __init__(self, openai_api_key: str, cache_ttl_days: int = 30):
+        self.model_name = "gpt-4"
         self.llm = ChatOpenAI(
-            model="gpt-4", 
+            model=self.model_name, 
             temperature=0,
             api_key=openai_api_key
         )
+        self.cache_ttl_days = cache_ttl_days
+        self._sys_msg = SystemMessage(content="You are a senior software architect providing detailed codebase analysis.")
         self.temp_dir = None
         self.current_state = None
-
+        # Directories that couldn't be deleted are renamed here and removed by one background worker
+        self._graveyard = Path(tempfile.gettempdir()) / 'whisper-graveyard'
+        self._gc_pending = set()
+        self._gc_lock = threading.Lock()
+        self._gc_thread = None
+        # Memoised repository scans keyed by clone path; dropped when the clone is cleaned up
+        self._scans: Dict[str, Dict[str, Any]] = {}
         
         # File patterns for different types
         self.config_files = {
@@ -66,6 +249,16 @@ class WhisperAnalysisAgent:
             'Laravel': ['composer.json', 'artisan', 'app/Http/'],
             'Rails': ['Gemfile', 'config/routes.rb', 'app/controllers/']
         }
+        # Extension -> (language or None, counts lines), so the scan does one lookup per file
+        self._ext_classes = {
+            ext: (self.LANG_MAP.get(ext), ext in self.CODE_EXTS)
+            for ext in self.LANG_MAP.keys() | self.CODE_EXTS
+        }
+        self._indicator_paths = frozenset(
+            indicator.rstrip('/')
+            for indicators in self.framework_indicators.values()
+            for indicator in indicators
+        )
 
     def _clone_repository_direct(self, repo_url: str) -> Dict[str, Any]:
         """Direct clone method for testing (without @tool decorator)."""
@@ -73,6 +266,7 @@ class WhisperAnalysisAgent:
         try:
             temp_dir = tempfile.mkdtemp()
             self.temp_dir = temp_dir
+            self._scans.pop(temp_dir, None)
             
             # Clean URL and clone
             if repo_url.startswith('https://github.com/'):
@@ -81,14 +275,19 @@ class WhisperAnalysisAgent:
                 # Handle various GitHub URL formats
                 clean_url = f"https://github.com/{repo_url.replace('https://github.com/', '')}"
             
-            repo = Repo.clone_from(clean_url, temp_dir)
+            # Analysis only needs the working tree at HEAD, so skip history and unused blobs
+            repo = Repo.clone_from(
+                clean_url,
+                temp_dir,
+                multi_options=['--depth=1', '--filter=blob:none', '--single-branch', '--no-tags']
+            )
             
             return {
                 "status": "success",
                 "clone_path": temp_dir,
                 "repository_name": Path(clean_url).name.replace('.git', ''),
                 "branch": repo.active_branch.name,
-                "commit_count": len(list(repo.iter_commits())),
+                "commit_count": int(repo.git.rev_list('--count', 'HEAD')),
                 "last_commit": repo.head.commit.hexsha[:8]
             }
             
@@ -109,6 +308,8 @@ class WhisperAnalysisAgent:
         import subprocess
         import time
         
+        self._scans.pop(directory_path, None)
+        
         if not os.path.exists(directory_path):
             return True
         
@@ -187,112 +388,171 @@ class WhisperAnalysisAgent:
 
     def _schedule_delayed_cleanup(self, directory_path: str):
         """Schedule cleanup for later - common on Windows due to file locking."""
-        import threading
-        import time
-        
-        def delayed_cleanup():
+        with self._gc_lock:
+            try:
+                # Renaming is O(1) and frees the original path immediately
+                self._graveyard.mkdir(parents=True, exist_ok=True)
+                os.replace(directory_path, self._graveyard / uuid.uuid4().hex)
+            except OSError:
+                # Locked or on another filesystem; the worker retries it in place
+                self._gc_pending.add(directory_path)
+            
+            if self._gc_thread is None or not self._gc_thread.is_alive():
+                self._gc_thread = threading.Thread(target=self._gc_loop, daemon=True)
+                self._gc_thread.start()
+
+    def _gc_loop(self):
+        """Single background worker that drains the graveyard until nothing is left."""
+        failed_passes = 0
+        while True:
             # Wait a bit for file handles to be released
             time.sleep(2)
             
-            # Try cleanup again
-            for attempt in range(3):
-                if self._cleanup_directory(directory_path):
-                    return
-                time.sleep(1)
+            with self._gc_lock:
+                targets = list(self._gc_pending)
+                if self._graveyard.exists():
+                    targets.extend(str(p) for p in self._graveyard.iterdir())
             
-            # If still can't clean up, it's likely Windows Temp cleanup will handle it
-            # This is normal behavior on Windows
-        
-        # Run cleanup in background thread
-        cleanup_thread = threading.Thread(target=delayed_cleanup, daemon=True)
-        cleanup_thread.start()
-
-
+            remaining = False
+            for target in targets:
+                if self._cleanup_directory(target):
+                    with self._gc_lock:
+                        self._gc_pending.discard(target)
+                else:
+                    remaining = True
+            
+            failed_passes = failed_passes + 1 if remaining else 0
+            
+            with self._gc_lock:
+                # After three failed passes it's likely Windows Temp cleanup will handle it
+                if (not remaining and not self._gc_pending) or failed_passes >= 3:
+                    self._gc_thread = None
+                    return
 
     @tool
     def clone_repository(self, repo_url: str) -> Dict[str, Any]:
         """Clone repository to temporary directory and return basic info."""
         return self._clone_repository_direct(repo_url)
 
-    def analyze_file_structure(self, root_path: str) -> Dict[str, Any]:
-        """Analyze the file structure and organization."""
-        structure = {}
+    def _scan_repo_once(self, root_path: str) -> Dict[str, Any]:
+        """Walk the repository a single time and index everything the analysis steps need."""
+        scan = self._scans.get(root_path)
+        if scan is not None:
+            return scan
+
         file_types = Counter()
-        directory_analysis = defaultdict(list)
-        
-        # Skip common directories that don't need analysis
-        skip_dirs = {
-            '.git', '__pycache__', 'node_modules', '.next', 'dist', 'build',
-            '.vscode', '.idea', 'coverage', '.pytest_cache', 'venv', 'env'
+        languages = Counter()
+        dir_tree = DirNode()
+        dir_set = set()
+        found_indicator_paths = set()
+        keyword_hits = defaultdict(set)
+        code_files = []
+        total_files = 0
+        ext_classes = self._ext_classes
+
+        # Explicit stack of (relative directory path, trie node); '' is the repository root
+        stack = [('', dir_tree)]
+        while stack:
+            rel_dir, node = stack.pop()
+            abs_dir = os.path.join(root_path, rel_dir) if rel_dir else root_path
+            subdirs = []
+
+            try:
+                entries = os.scandir(abs_dir)
+            except OSError:
+                continue
+
+            with entries:
+                for entry in entries:
+                    name = entry.name
+                    rel_path = f"{rel_dir}/{name}" if rel_dir else name
+
+                    if rel_path in self._indicator_paths:
+                        found_indicator_paths.add(rel_path)
+                    if not rel_dir:
+                        keyword_hits["event"].update(self.EVENT_KEYWORD_RE.findall(name.lower()))
+
+                    # Symlinked directories are directories (as in os.walk) but are never descended
+                    if entry.is_dir():
+                        if name not in self.SKIP_DIRS:
+                            dir_set.add(rel_path)
+                            if not entry.is_symlink():
+                                child = node.children[sys.intern(name)] = DirNode()
+                                subdirs.append((rel_path, child))
+                        continue
+
+                    file_ext = _ext(name)
+                    ext_class = ext_classes.get(file_ext)
+
+                    # Language counts include dot-files; the file listing below does not
+                    if ext_class is not None and ext_class[0]:
+                        languages[ext_class[0]] += 1
+
+                    if name.startswith('.') and name not in self.ALLOWED_DOTFILES:
+                        continue
+
+                    file_types[file_ext] += 1
+                    node.files.append(sys.intern(name))
+                    total_files += 1
+
+                    if ext_class is not None and ext_class[1] and not self.GENERATED_FILE_RE.match(name):
+                        try:
+                            size = entry.stat().st_size
+                        except OSError:
+                            size = 0
+                        if 0 < size <= self.MAX_LINE_COUNT_BYTES:
+                            code_files.append(entry.path)
+
+            # Visit subdirectories in listing order (top-down, like os.walk)
+            stack.extend(reversed(subdirs))
+
+        scan = {
+            "file_types": file_types,
+            "languages": languages,
+            "directory_tree": dir_tree,
+            "directories": dir_set,
+            "found_indicator_paths": found_indicator_paths,
+            "keyword_hits": keyword_hits,
+            "code_files": code_files,
+            "total_files": total_files
         }
+        self._scans[root_path] = scan
+        return scan
+
+    def analyze_file_structure(self, root_path: str) -> Dict[str, Any]:
+        """Analyze the file structure and organization."""
+        scan = self._scan_repo_once(root_path)
         
-        total_files = 0
+        # Count lines for code files; reads are IO-bound so fan them out
+        code_files = scan["code_files"]
         total_lines = 0
+        if code_files:
+            max_workers = min(32, (os.cpu_count() or 1) * 4, len(code_files))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(count_lines_in_file, path) for path in code_files]
+                total_lines = sum(future.result() for future in futures)
         
-        for root, dirs, files in os.walk(root_path):
-            # Filter out skip directories
-            dirs[:] = [d for d in dirs if d not in skip_dirs]
-            
-            rel_path = os.path.relpath(root, root_path)
-            if rel_path == '.':
-                rel_path = 'root'
-            
-            for file in files:
-                if file.startswith('.') and file not in ['.env.example', '.gitignore', '.dockerignore']:
-                    continue
-                    
-                file_path = os.path.join(root, file)
-                file_ext = Path(file).suffix.lower()
-                
-                file_types[file_ext] += 1
-                directory_analysis[rel_path].append(file)
-                total_files += 1
-                
-                # Count lines for code files
-                if file_ext in ['.py', '.js', '.jsx', '.ts', '.tsx', '.java', '.cpp', '.c', '.go', '.rs']:
-                    try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            lines = len(f.readlines())
-                            total_lines += lines
-                    except:
-                        pass
+        # The trie is only flattened here, where the result enters the workflow state
+        directory_analysis = scan["directory_tree"].flatten()
         
         return {
-            "total_files": total_files,
+            "total_files": scan["total_files"],
             "total_lines": total_lines,
-            "file_types": dict(file_types.most_common()),
-            "directory_structure": dict(directory_analysis),
+            "file_types": scan["file_types"],
+            "directory_structure": directory_analysis,
             "main_directories": list(directory_analysis.keys())[:20]
         }
 
     def detect_languages_and_frameworks(self, root_path: str) -> Dict[str, Any]:
-        """Detect programming languages and frameworks used."""
-        languages = Counter()
+        """Detect programming languages and frameworks used (files under SKIP_DIRS are not counted)."""
+        scan = self._scan_repo_once(root_path)
+        languages = scan["languages"]
+        found_indicator_paths = scan["found_indicator_paths"]
         frameworks = []
         
-        # Language detection by file extension
-        language_map = {
-            '.py': 'Python', '.js': 'JavaScript', '.ts': 'TypeScript',
-            '.jsx': 'React JSX', '.tsx': 'TypeScript React',
-            '.java': 'Java', '.cpp': 'C++', '.c': 'C',
-            '.go': 'Go', '.rs': 'Rust', '.php': 'PHP',
-            '.rb': 'Ruby', '.swift': 'Swift', '.kt': 'Kotlin',
-            '.cs': 'C#', '.scala': 'Scala', '.clj': 'Clojure'
-        }
-        
-        for root, dirs, files in os.walk(root_path):
-            for file in files:
-                ext = Path(file).suffix.lower()
-                if ext in language_map:
-                    languages[language_map[ext]] += 1
-        
         # Framework detection
         for framework, indicators in self.framework_indicators.items():
-            score = 0
-            for indicator in indicators:
-                indicator_path = os.path.join(root_path, indicator)
-                if os.path.exists(indicator_path):
-                    score += 1
+            score = sum(1 for indicator in indicators if indicator.rstrip('/') in found_indicator_paths)
             
             if score >= len(indicators) * 0.5:  # At least 50% of indicators present
                 frameworks.append({
@@ -302,8 +562,8 @@ class WhisperAnalysisAgent:
                 })
         
         return {
-            "languages": dict(languages.most_common()),
-            "primary_language": languages.most_common(1)[0][0] if languages else "Unknown",
+            "languages": languages,
+            "primary_language": max(languages, key=languages.get) if languages else "Unknown",
             "frameworks": sorted(frameworks, key=lambda x: x['confidence'], reverse=True),
             "total_code_files": sum(languages.values())
         }
@@ -321,11 +581,15 @@ class WhisperAnalysisAgent:
         req_file = os.path.join(root_path, 'requirements.txt')
         if os.path.exists(req_file):
             try:
-                with open(req_file, 'r') as f:
-                    deps = [line.strip().split('==')[0].split('>=')[0].split('~=')[0] 
-                           for line in f.readlines() 
-                           if line.strip() and not line.startswith('#')]
-                    dependencies['Python'] = deps[:20]  # Limit for readability
+                deps = []
+                with open(req_file, 'rb') as f:
+                    for line in f:
+                        match = self.REQUIREMENT_RE.match(line)
+                        if match:
+                            deps.append(match.group(1).decode())
+                            if len(deps) == 20:  # Limit for readability
+                                break
+                dependencies['Python'] = deps
             except:
                 pass
         
@@ -333,8 +597,8 @@ class WhisperAnalysisAgent:
         package_file = os.path.join(root_path, 'package.json')
         if os.path.exists(package_file):
             try:
-                with open(package_file, 'r') as f:
-                    package_data = json.load(f)
+                with open(package_file, 'rb') as f:
+                    package_data = _json_loads(f.read())
                     deps = []
                     if 'dependencies' in package_data:
                         deps.extend(list(package_data['dependencies'].keys()))
@@ -348,10 +612,10 @@ class WhisperAnalysisAgent:
         go_mod = os.path.join(root_path, 'go.mod')
         if os.path.exists(go_mod):
             try:
-                with open(go_mod, 'r') as f:
+                with open(go_mod, 'rb') as f:
                     content = f.read()
-                    deps = re.findall(r'require\s+([^\s]+)', content)
-                    dependencies['Go'] = deps[:20]
+                matches = islice(self.GO_REQUIRE_RE.finditer(content), 20)
+                dependencies['Go'] = [m.group(1).decode() for m in matches]
             except:
                 pass
         
@@ -361,7 +625,7 @@ class WhisperAnalysisAgent:
             try:
                 with open(pom_file, 'r') as f:
                     content = f.read()
-                    deps = re.findall(r'<artifactId>([^<]+)</artifactId>', content)
+                    deps = self.POM_ARTIFACT_RE.findall(content)
                     dependencies['Java'] = deps[:20]
             except:
                 pass
@@ -372,37 +636,38 @@ class WhisperAnalysisAgent:
         """Identify architectural patterns and design approaches."""
         patterns = []
         
-        # Check for common architectural patterns
-        dirs = [d for d in os.listdir(root_path) if os.path.isdir(os.path.join(root_path, d))]
-        files = [f for f in os.listdir(root_path) if os.path.isfile(os.path.join(root_path, f))]
+        # Check for common architectural patterns against the pre-indexed tree
+        scan = self._scan_repo_once(root_path)
+        dir_set = scan["directories"]
+        dirs = {d for d in dir_set if '/' not in d}
+        files = set(scan["directory_tree"].files)
         
         # MVC Pattern
-        if any(d in ['models', 'views', 'controllers'] for d in dirs) or \
-           any(d in ['app/models', 'app/views', 'app/controllers'] for d in dirs):
+        if self.MVC_DIRS & dirs or self.NESTED_MVC_DIRS & dir_set:
             patterns.append("MVC (Model-View-Controller)")
         
         # Microservices
-        if 'docker-compose.yml' in files or 'kubernetes' in dirs or 'k8s' in dirs:
+        if 'docker-compose.yml' in files or self.MICROSERVICE_DIRS & dirs:
             patterns.append("Microservices Architecture")
         
         # Clean Architecture
-        if any(d in ['domain', 'infrastructure', 'application', 'interfaces'] for d in dirs):
+        if self.CLEAN_ARCH_DIRS & dirs:
             patterns.append("Clean Architecture")
         
         # Component-based (React/Vue)
-        if 'components' in dirs or 'src/components' in [os.path.join(r, d) for r, dirs, f in os.walk(root_path) for d in dirs]:
+        if 'components' in dirs or 'src/components' in dir_set:
             patterns.append("Component-Based Architecture")
         
         # Layered Architecture
-        if any(d in ['services', 'repositories', 'entities', 'dto'] for d in dirs):
+        if self.LAYERED_DIRS & dirs:
             patterns.append("Layered Architecture")
         
         # Event-Driven
-        if any(keyword in str(dirs + files).lower() for keyword in ['event', 'queue', 'pub', 'sub', 'kafka', 'rabbitmq']):
+        if scan["keyword_hits"]["event"]:
             patterns.append("Event-Driven Architecture")
         
         # API-First
-        if any(f in ['openapi.yml', 'swagger.yml', 'api.yml'] for f in files) or 'api' in dirs:
+        if self.API_SPEC_FILES & files or 'api' in dirs:
             patterns.append("API-First Design")
         
         return patterns
@@ -411,6 +676,10 @@ class WhisperAnalysisAgent:
         """Extract and analyze main components/modules."""
         components = []
         
+        # One directory listing; DirEntry caches type and stat info for the lookups below
+        with os.scandir(root_path) as it:
+            entries = {entry.name: entry for entry in it}
+        
         # Look for main application files
         main_files = []
         
@@ -421,25 +690,23 @@ class WhisperAnalysisAgent:
         ]
         
         for pattern in main_patterns:
-            file_path = os.path.join(root_path, pattern)
-            if os.path.exists(file_path):
+            if pattern in entries:
                 main_files.append({
                     "name": pattern,
                     "type": "Entry Point",
                     "path": pattern,
-                    "size": os.path.getsize(file_path)
+                    "size": entries[pattern].stat().st_size
                 })
         
         # Look for configuration files
         config_files = []
         for config_file in self.config_files:
-            file_path = os.path.join(root_path, config_file)
-            if os.path.exists(file_path):
+            if config_file in entries:
                 config_files.append({
                     "name": config_file,
                     "type": "Configuration",
                     "path": config_file,
-                    "size": os.path.getsize(file_path)
+                    "size": entries[config_file].stat().st_size
                 })
         
         # Look for important directories
@@ -459,9 +726,10 @@ class WhisperAnalysisAgent:
         }
         
         for dir_name, dir_type in dir_types.items():
-            dir_path = os.path.join(root_path, dir_name)
-            if os.path.exists(dir_path) and os.path.isdir(dir_path):
-                file_count = len([f for f in os.listdir(dir_path) if os.path.isfile(os.path.join(dir_path, f))])
+            entry = entries.get(dir_name)
+            if entry is not None and entry.is_dir():
+                with os.scandir(entry.path) as it:
+                    file_count = sum(1 for child in it if child.is_file())
                 important_dirs.append({
                     "name": dir_name,
                     "type": dir_type,
@@ -475,49 +743,100 @@ class WhisperAnalysisAgent:
         
         return components
 
-    async def analyze_code_with_llm(self, analysis_data: Dict) -> str:
-        """Use LLM to provide architectural insights."""
-        
-        prompt = f"""
-        As a senior software architect, analyze this codebase structure and provide comprehensive insights:
-
-        Repository Analysis:
-        - Primary Language: {analysis_data['language_analysis']['primary_language']}
-        - Languages Used: {', '.join(analysis_data['language_analysis']['languages'].keys())}
-        - Frameworks: {', '.join([f['name'] for f in analysis_data['language_analysis']['frameworks']])}
-        - Total Files: {analysis_data['file_structure']['total_files']}
-        - Total Lines of Code: {analysis_data['file_structure']['total_lines']}
-
-        Directory Structure:
-        {json.dumps(analysis_data['file_structure']['main_directories'], indent=2)}
+    def _llm_cache_path(self, prompt_hash: str) -> Path:
+        """Location of the cached response for a prompt hash."""
+        return self.LLM_CACHE_DIR / f"{self.model_name}-{prompt_hash}.json"
 
-        Main Components:
-        {json.dumps([c['name'] + ' (' + c['type'] + ')' for c in analysis_data['main_components']], indent=2)}
+    def _load_cached_response(self, prompt_hash: str) -> Optional[str]:
+        """Return a cached LLM response if one exists and hasn't expired."""
+        cache_path = self._llm_cache_path(prompt_hash)
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        ttl_seconds = entry.get("ttl_days", self.cache_ttl_days) * 86400
+        if time.time() - entry.get("created_at", 0) > ttl_seconds:
+            return None
+        return entry.get("response_text")
 
-        Architectural Patterns Detected:
-        {', '.join(analysis_data['architecture_patterns']) if analysis_data['architecture_patterns'] else 'None clearly identified'}
+    def _store_cached_response(self, prompt_hash: str, prompt: str, response_text: str, latency_ms: float):
+        """Persist an LLM response atomically so readers never see a partial file."""
+        cache_path = self._llm_cache_path(prompt_hash)
+        entry = {
+            "prompt_hash": prompt_hash,
+            "model_name": self.model_name,
+            "prompt_text": prompt,
+            "response_text": response_text,
+            "latency_ms": latency_ms,
+            "created_at": time.time(),
+            "ttl_days": self.cache_ttl_days
+        }
+        tmp_path = None
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=cache_path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, cache_path)
+            tmp_path = None
+        except OSError as e:
+            logger.warning(f"Failed to cache LLM response: {e}")
+        finally:
+            # Don't leave a partial .tmp file behind if the write or rename failed
+            if tmp_path is not None:
+                with contextlib.suppress(OSError):
+                    os.unlink(tmp_path)
 
-        Dependencies:
-        {json.dumps(analysis_data['dependencies'], indent=2)}
+    def _build_insight_prompt(self, analysis_data: Dict) -> str:
+        """Build the architectural-insight prompt from the deterministic analysis data."""
+        language_analysis = analysis_data['language_analysis']
+        file_structure = analysis_data['file_structure']
+        patterns = analysis_data['architecture_patterns']
+        
+        return PROMPT_TEMPLATE.format_map({
+            "primary_language": language_analysis['primary_language'],
+            "languages": ', '.join(_by_count(language_analysis['languages'])),
+            "frameworks": ', '.join(f['name'] for f in language_analysis['frameworks']),
+            "total_files": file_structure['total_files'],
+            "total_lines": file_structure['total_lines'],
+            "main_directories": _json_dumps(file_structure['main_directories']),
+            "main_components": _json_dumps([c['name'] + ' (' + c['type'] + ')' for c in analysis_data['main_components']]),
+            "patterns": ', '.join(patterns) if patterns else 'None clearly identified',
+            "dependencies": _json_dumps(analysis_data['dependencies'])
+        })
 
-        Please provide:
-        1. **Architecture Overview**: High-level description of the system architecture
-        2. **Technology Stack Assessment**: Analysis of technology choices and their suitability
-        3. **Code Organization**: How well the code is structured and organized
-        4. **Scalability Considerations**: Potential scalability strengths and challenges
-        5. **Maintainability**: Code maintainability and technical debt indicators
-        6. **Recommendations**: Specific suggestions for improvement
+    def _insight_messages(self, prompt: str) -> List[Any]:
+        """Chat messages for an architectural-insight prompt."""
+        return [self._sys_msg, HumanMessage(content=prompt)]
 
-        Format your response as clear, actionable insights that would be valuable for developers and stakeholders.
-        """
+    async def stream_code_analysis(self, analysis_data: Dict) -> AsyncIterator[str]:
+        """Stream LLM architectural insights as text deltas (a cached response arrives as one delta)."""
+        prompt = self._build_insight_prompt(analysis_data)
+        
+        prompt_hash = hashlib.sha256(prompt.encode()).hexdigest()
+        cached = self._load_cached_response(prompt_hash)
+        if cached is not None:
+            logger.info(f"Using cached architectural insights ({prompt_hash[:12]})")
+            yield cached
+            return
 
-        messages = [
-            SystemMessage(content="You are a senior software architect providing detailed codebase analysis."),
-            HumanMessage(content=prompt)
-        ]
+        messages = self._insight_messages(prompt)
+        
+        started = time.perf_counter()
+        deltas = []
+        async for chunk in self.llm.astream(messages):
+            if chunk.content:
+                deltas.append(chunk.content)
+                yield chunk.content
+        latency_ms = (time.perf_counter() - started) * 1000
         
-        response = await self.llm.ainvoke(messages)
-        return response.content
+        self._store_cached_response(prompt_hash, prompt, ''.join(deltas), latency_ms)
+
+    async def analyze_code_with_llm(self, analysis_data: Dict) -> str:
+        """Use LLM to provide architectural insights."""
+        return ''.join([delta async for delta in self.stream_code_analysis(analysis_data)])
 
     # LangGraph workflow functions
     async def clone_and_setup(self, state: WhisperAnalysisState) -> WhisperAnalysisState:
@@ -544,73 +863,100 @@ class WhisperAnalysisAgent:
         
         return state
 
+    def _publish(self, kind: str, payload: Any):
+        """Hand an intermediate event to analyze_repository while a workflow is running."""
+        queue = _progress_queue.get()
+        if queue is not None:
+            queue.put_nowait((kind, payload))
+
+    def _complete_branch(self, state: WhisperAnalysisState, step: str):
+        """Record completion of one parallel analysis branch and publish progress."""
+        state["current_step"] = step
+        state["progress"] = min(85.0, state["progress"] + 20.0)
+        self._publish("branch", dict(state))
+
     async def analyze_structure(self, state: WhisperAnalysisState) -> WhisperAnalysisState:
-        """Step 2: Analyze file structure."""
-        state["current_step"] = "Starting file structure analysis..."
-        state["progress"] = 20.0
-        
-        if not state["clone_path"]:
-            state["errors"].append("No clone path available")
-            return state
-        
+        """Branch: Analyze file structure."""
         try:
-            state["current_step"] = "Analyzing file structure..."
-            state["progress"] = 30.0
-            
-            file_structure = self.analyze_file_structure(state["clone_path"])
+            file_structure = await asyncio.to_thread(self.analyze_file_structure, state["clone_path"])
             state["file_structure"] = file_structure
             
-            state["current_step"] = "File structure analysis complete"
-            state["progress"] = 40.0
+            self._complete_branch(state, "File structure analysis complete")
         except Exception as e:
             state["errors"].append(f"File structure analysis failed: {str(e)}")
         
         return state
 
     async def analyze_languages(self, state: WhisperAnalysisState) -> WhisperAnalysisState:
-        """Step 3: Analyze languages and frameworks."""
-        state["current_step"] = "Starting language detection..."
-        state["progress"] = 45.0
-        
+        """Branch: Analyze languages and frameworks."""
         try:
-            state["current_step"] = "Detecting languages and frameworks..."
-            state["progress"] = 55.0
-            
-            language_analysis = self.detect_languages_and_frameworks(state["clone_path"])
+            language_analysis = await asyncio.to_thread(self.detect_languages_and_frameworks, state["clone_path"])
             state["language_analysis"] = language_analysis
             
-            dependencies = self.analyze_dependencies(state["clone_path"])
+            dependencies = await asyncio.to_thread(self.analyze_dependencies, state["clone_path"])
             state["dependencies"] = dependencies
             
-            state["current_step"] = "Language analysis complete"
-            state["progress"] = 65.0
+            self._complete_branch(state, "Language analysis complete")
         except Exception as e:
             state["errors"].append(f"Language analysis failed: {str(e)}")
         
         return state
 
     async def identify_architecture(self, state: WhisperAnalysisState) -> WhisperAnalysisState:
-        """Step 4: Identify architectural patterns and components."""
-        state["current_step"] = "Starting architecture analysis..."
-        state["progress"] = 70.0
-        
+        """Branch: Identify architectural patterns and components."""
         try:
-            state["current_step"] = "Identifying architecture patterns..."
-            state["progress"] = 80.0
-            
-            patterns = self.identify_architectural_patterns(state["clone_path"], state["language_analysis"])
+            patterns = await asyncio.to_thread(
+                self.identify_architectural_patterns, state["clone_path"], state["language_analysis"]
+            )
             state["architecture_patterns"] = patterns
             
-            components = self.extract_main_components(state["clone_path"], state["language_analysis"])
+            components = await asyncio.to_thread(
+                self.extract_main_components, state["clone_path"], state["language_analysis"]
+            )
             state["main_components"] = components
             
-            state["current_step"] = "Architecture analysis complete"
-            state["progress"] = 85.0
+            self._complete_branch(state, "Architecture analysis complete")
         except Exception as e:
             state["errors"].append(f"Architecture analysis failed: {str(e)}")
         
         return state
 
+    async def fan_out_analysis(self, state: WhisperAnalysisState) -> WhisperAnalysisState:
+        """Step 2: Run structure, language and architecture analysis concurrently."""
+        state["current_step"] = "Scanning repository..."
+        state["progress"] = 20.0
+        
+        if not state["clone_path"]:
+            state["errors"].append("No clone path available")
+            return state
+        
+        try:
+            # Walk the tree once up front; every branch reads the memoised scan
+            await asyncio.to_thread(self._scan_repo_once, state["clone_path"])
+        except Exception as e:
+            state["errors"].append(f"Repository scan failed: {str(e)}")
+            return state
+        
+        state["current_step"] = "Analyzing structure, languages and architecture..."
+        state["progress"] = 25.0
+        
+        # The branches only depend on clone_path, so they have no ordering constraints
+        await asyncio.gather(
+            self.analyze_structure(state),
+            self.analyze_languages(state),
+            self.identify_architecture(state)
+        )
+        
+        state["current_step"] = "Structure, language and architecture analysis complete"
+        return state
+
+    async def join_analysis(self, state: WhisperAnalysisState) -> WhisperAnalysisState:
+        """Step 3: Collect the parallel branch results before generating insights."""
+        state["current_step"] = "Repository analysis complete"
+        state["progress"] = 85.0
+        
+        return state
+
     async def generate_insights(self, state: WhisperAnalysisState) -> WhisperAnalysisState:
         """Step 5: Generate AI-powered insights."""
         state["current_step"] = "Preparing AI analysis..."
@@ -620,15 +966,18 @@ class WhisperAnalysisAgent:
             state["current_step"] = "Generating architectural insights..."
             state["progress"] = 92.0
             
-            insights = await self.analyze_code_with_llm({
+            deltas = []
+            async for delta in self.stream_code_analysis({
                 "language_analysis": state["language_analysis"],
                 "file_structure": state["file_structure"],
                 "main_components": state["main_components"],
                 "architecture_patterns": state["architecture_patterns"],
                 "dependencies": state["dependencies"]
-            })
+            }):
+                deltas.append(delta)
+                self._publish("insight_chunk", delta)
             
-            state["architectural_insights"] = insights
+            state["architectural_insights"] = ''.join(deltas)
             state["current_step"] = "Analysis complete!"
             state["progress"] = 100.0
         except Exception as e:
@@ -644,17 +993,15 @@ class WhisperAnalysisAgent:
         
         # Add workflow steps
         workflow.add_node("clone", self.clone_and_setup)
-        workflow.add_node("structure", self.analyze_structure)
-        workflow.add_node("languages", self.analyze_languages)
-        workflow.add_node("architecture", self.identify_architecture)
+        workflow.add_node("fanout", self.fan_out_analysis)
+        workflow.add_node("join", self.join_analysis)
         workflow.add_node("insights", self.generate_insights)
         
-        # Define the workflow sequence
+        # Define the workflow sequence; "fanout" runs the independent analyses in parallel
         workflow.set_entry_point("clone")
-        workflow.add_edge("clone", "structure")
-        workflow.add_edge("structure", "languages")
-        workflow.add_edge("languages", "architecture")
-        workflow.add_edge("architecture", "insights")
+        workflow.add_edge("clone", "fanout")
+        workflow.add_edge("fanout", "join")
+        workflow.add_edge("join", "insights")
         workflow.add_edge("insights", END)
         
         return workflow.compile()
@@ -685,13 +1032,40 @@ class WhisperAnalysisAgent:
         # Create and run workflow
         workflow = self.create_workflow()
         
+        # Node outputs, parallel branch updates and insight deltas are merged through one queue
+        queue = asyncio.Queue()
+        
+        async def run_workflow():
+            # Nodes run in tasks copied from this context, so _publish finds this run's queue
+            _progress_queue.set(queue)
+            try:
+                async for step_output in workflow.astream(initial_state):
+                    # LangGraph returns a dict with node names as keys
+                    for node_name, state in step_output.items():
+                        queue.put_nowait(("node", state))
+            finally:
+                queue.put_nowait(None)
+        
+        workflow_task = asyncio.create_task(run_workflow())
+        
         final_state = None
-        async for step_output in workflow.astream(initial_state):
-            # LangGraph returns a dict with node names as keys
-            for node_name, state in step_output.items():
-                final_state = state
+        last_state = initial_state
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                
+                kind, payload = item
+                if kind == "insight_chunk":
+                    yield {"type": "insight_chunk", "delta": payload}
+                    continue
+                
+                state = last_state = payload
+                if kind == "node":
+                    final_state = state
+                
                 self.current_state = state
-                # You can emit progress updates here for real-time UI updates
                 yield {
                     "type": "progress",
                     "current_step": state["current_step"],
@@ -703,19 +1077,39 @@ class WhisperAnalysisAgent:
                         "main_components": state.get("main_components", [])
                     }
                 }
-        
-        # Cleanup with Windows-compatible error handling
-        if self.temp_dir and os.path.exists(self.temp_dir):
-            cleanup_success = self._cleanup_directory(self.temp_dir)
-            if not cleanup_success:
-                # Schedule cleanup for later - this is normal on Windows
-                self._schedule_delayed_cleanup(self.temp_dir)
-            self.temp_dir = None
+            
+            # Surface any exception raised inside the workflow
+            await workflow_task
+        finally:
+            # Stop the workflow if the consumer went away (e.g. the client disconnected)
+            if not workflow_task.done():
+                workflow_task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await workflow_task
+            
+            # Snapshots still queued may be the only record of where this run cloned to
+            while not queue.empty():
+                item = queue.get_nowait()
+                if item is not None and item[0] != "insight_chunk":
+                    last_state = item[1]
+            
+            # Cleanup with Windows-compatible error handling
+            clone_path = last_state.get("clone_path")
+            if clone_path and os.path.exists(clone_path):
+                cleanup_success = self._cleanup_directory(clone_path)
+                if not cleanup_success:
+                    # Schedule cleanup for later - this is normal on Windows
+                    self._schedule_delayed_cleanup(clone_path)
+            if self.temp_dir == clone_path:
+                self.temp_dir = None
+        
+        if final_state is None:
+            raise RuntimeError(f"Analysis workflow for {repository_url} produced no result")
         
         # Return final results
         yield {
             "type": "completed",
-            "results": {
+            "results": _with_ordered_counts({
                 "repository_url": final_state["repository_url"],
                 "file_structure": final_state["file_structure"],
                 "language_analysis": final_state["language_analysis"],
@@ -724,7 +1118,7 @@ class WhisperAnalysisAgent:
                 "dependencies": final_state["dependencies"],
                 "architectural_insights": final_state["architectural_insights"],
                 "errors": final_state["errors"]
-            }
+            })
         }
 
     async def create_security_pr(
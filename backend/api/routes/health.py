@@ -2,19 +2,23 @@
 Health check endpoints.
 """
 
+import time
+import orjson
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse, Response
 
 from models.api_models import HealthCheck
-from core.app import get_analysis_service, get_uptime
+from core import app as app_state
 from config.settings import settings
 
 router = APIRouter()
 
-@router.get("/health", response_model=HealthCheck)
+@router.get("/health", response_model=HealthCheck, response_class=ORJSONResponse)
 async def health_check():
     """Check the health status of the API and its components."""
     try:
-        analysis_service = get_analysis_service()
+        # Plain module attribute reads; probes must never wait on a lock
+        analysis_service = app_state.analysis_service
         
         # Check if analysis service is available
         agent_ready = analysis_service is not None
@@ -42,35 +46,38 @@ async def health_check():
             status=status,
             agent_ready=agent_ready,
             version="2.0.0",  # Updated version for smart analysis
-            uptime=get_uptime(),
+            uptime=time.monotonic() - app_state.start_time,
             tools_available=tools_available
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Health check failed: {str(e)}")
 
+# The root payload never changes, so encode it once at import
+_ROOT_BYTES = orjson.dumps({
+    "message": "Whisper API - AI-Powered Repository Analysis",
+    "version": "2.0.0",
+    "capabilities": [
+        "Legacy repository analysis",
+        "Smart context-based analysis", 
+        "AI-powered tool selection",
+        "Real-time progress updates",
+        "Multi-tool execution",
+        "Vulnerability scanning",
+        "Architecture analysis"
+    ],
+    "endpoints": {
+        "health": "/health",
+        "docs": "/docs",
+        "legacy_tasks": "/api/tasks/",
+        "smart_tasks": "/api/smart-tasks/",
+        "tools": "/api/tools",
+        "websocket_legacy": "/ws/tasks/{task_id}",
+        "websocket_smart": "/ws/smart-tasks/{task_id}"
+    }
+})
+
 @router.get("/")
 async def root():
     """Root endpoint with API information."""
-    return {
-        "message": "Whisper API - AI-Powered Repository Analysis",
-        "version": "2.0.0",
-        "capabilities": [
-            "Legacy repository analysis",
-            "Smart context-based analysis", 
-            "AI-powered tool selection",
-            "Real-time progress updates",
-            "Multi-tool execution",
-            "Vulnerability scanning",
-            "Architecture analysis"
-        ],
-        "endpoints": {
-            "health": "/health",
-            "docs": "/docs",
-            "legacy_tasks": "/api/tasks/",
-            "smart_tasks": "/api/smart-tasks/",
-            "tools": "/api/tools",
-            "websocket_legacy": "/ws/tasks/{task_id}",
-            "websocket_smart": "/ws/smart-tasks/{task_id}"
-        }
-    } 
\ No newline at end of file
+    return Response(content=_ROOT_BYTES, media_type="application/json")
@@ -2,10 +2,7 @@
 Task management endpoints.
 """
 
-import os
-import asyncio
 import logging
-from typing import Dict, Any, Optional
 from fastapi import APIRouter, HTTPException, Depends
 
 from models.api_models import (
@@ -14,31 +11,32 @@ from models.api_models import (
     GitHubServiceStatus
 )
 from core.app import get_analysis_service
-from services.openai_service import OpenAIService
+from services.analysis_service import AnalysisService
 from config.settings import settings
-from core.context_analyzer import ContextAnalyzer
-from core.tool_registry import get_tool_registry
+from core.context_analyzer import context_analyzer
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Host and port are fixed once settings load, so build the URL prefixes once
+_TASKS_WS_PREFIX = f"ws://{settings.HOST}:{settings.PORT}/ws/tasks/"
+_SMART_WS_PREFIX = f"ws://{settings.HOST}:{settings.PORT}/ws/smart-tasks/"
+
+async def analysis_service_dep() -> AnalysisService:
+    """Resolve the analysis service, or fail the request with 503."""
+    analysis_service = get_analysis_service()
+    if analysis_service is None:
+        raise HTTPException(status_code=503, detail="Analysis service not available")
+    return analysis_service
+
 @router.post("/analyze-intent", response_model=AIAnalysis)
 async def analyze_intent(request: IntentAnalysisRequest):
     """Analyze user intent using our advanced multi-action context analyzer."""
     
     try:
-        # Use our new multi-action context analyzer with proper async handling
-        analyzer = ContextAnalyzer()
-        
-        # First try AI parsing directly (proper async)
-        ai_result = await analyzer._parse_intent_with_ai(request.context)
-        
-        if ai_result:
-            # AI parsing successful
-            parsed_intent = ai_result
-        else:
-            # Fall back to rule-based parsing
-            parsed_intent = analyzer._parse_intent_fallback(request.context)
+        # Use our shared multi-action context analyzer (AI first, rule-based fallback);
+        # the AI result is cached, so the analysis that follows reuses it
+        parsed_intent = await context_analyzer._parse_intent(request.context)
         
         # Convert our multi-action format to the expected AIAnalysis format
         detected_intents = []
@@ -98,12 +96,8 @@ async def analyze_intent(request: IntentAnalysisRequest):
         raise HTTPException(status_code=500, detail=f"Intent analysis failed: {str(e)}")
 
 @router.post("/tasks/", response_model=AnalysisResponse)
-async def create_analysis_task(request: AnalysisRequest):
+async def create_analysis_task(request: AnalysisRequest, analysis_service: AnalysisService = Depends(analysis_service_dep)):
     """Create a new repository analysis task (legacy endpoint)."""
-    analysis_service = get_analysis_service()
-    if analysis_service is None:
-        raise HTTPException(status_code=503, detail="Analysis service not available")
-    
     task_id = await analysis_service.create_task(
         repository_url=request.repository_url,
         task_type=request.task_type,
@@ -111,7 +105,7 @@ async def create_analysis_task(request: AnalysisRequest):
     )
     
     # Construct WebSocket URL
-    websocket_url = f"ws://{settings.HOST}:{settings.PORT}/ws/tasks/{task_id}"
+    websocket_url = _TASKS_WS_PREFIX + task_id
     
     return AnalysisResponse(
         task_id=task_id,
@@ -124,12 +118,8 @@ async def create_analysis_task(request: AnalysisRequest):
     )
 
 @router.post("/smart-tasks/", response_model=SmartAnalysisResponse)
-async def create_smart_analysis_task(request: SmartAnalysisRequest):
+async def create_smart_analysis_task(request: SmartAnalysisRequest, analysis_service: AnalysisService = Depends(analysis_service_dep)):
     """Create a new smart context-based analysis task."""
-    analysis_service = get_analysis_service()
-    if analysis_service is None:
-        raise HTTPException(status_code=503, detail="Analysis service not available")
-    
     task_id = await analysis_service.create_smart_task(
         repository_url=request.repository_url,
         context=request.context,
@@ -141,7 +131,7 @@ async def create_smart_analysis_task(request: SmartAnalysisRequest):
     )
     
     # Construct WebSocket URL
-    websocket_url = f"ws://{settings.HOST}:{settings.PORT}/ws/smart-tasks/{task_id}"
+    websocket_url = _SMART_WS_PREFIX + task_id
     
     return SmartAnalysisResponse(
         task_id=task_id,
@@ -152,32 +142,20 @@ async def create_smart_analysis_task(request: SmartAnalysisRequest):
     )
 
 @router.get("/tasks/{task_id}", response_model=TaskStatus)
-async def get_task_status(task_id: str):
+async def get_task_status(task_id: str, analysis_service: AnalysisService = Depends(analysis_service_dep)):
     """Get the status of a specific task."""
-    analysis_service = get_analysis_service()
-    if analysis_service is None:
-        raise HTTPException(status_code=503, detail="Analysis service not available")
-    
     status_info = analysis_service.get_task_status(task_id)
     return TaskStatus(**status_info)
 
 @router.get("/active-connections", response_model=ActiveConnectionsInfo)
-async def get_active_connections():
+async def get_active_connections(analysis_service: AnalysisService = Depends(analysis_service_dep)):
     """Get information about active WebSocket connections."""
-    analysis_service = get_analysis_service()
-    if analysis_service is None:
-        raise HTTPException(status_code=503, detail="Analysis service not available")
-    
     connections_info = analysis_service.get_active_connections_info()
     return ActiveConnectionsInfo(**connections_info)
 
 @router.get("/tools", response_model=ToolRegistryInfo)
-async def get_tool_registry_info():
+async def get_tool_registry_info(analysis_service: AnalysisService = Depends(analysis_service_dep)):
     """Get information about available analysis tools."""
-    analysis_service = get_analysis_service()
-    if analysis_service is None:
-        raise HTTPException(status_code=503, detail="Analysis service not available")
-    
     try:
         registry_info = await analysis_service.get_tool_registry_info()
         return ToolRegistryInfo(**registry_info)
@@ -3,15 +3,50 @@ WebSocket endpoints for real-time analysis updates.
 """
 
 import asyncio
-import json
 import logging
+import orjson
+from typing import Optional
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
 from core.app import get_analysis_service
+from config.settings import settings
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Bounds how many analyses run at once; further requests wait for a slot.
+# Created on first use so it binds to the server's event loop (Python 3.9 binds at construction).
+_analysis_sema: Optional[asyncio.Semaphore] = None
+
+def _get_analysis_sema() -> asyncio.Semaphore:
+    """Return the analysis semaphore, creating it inside the running event loop."""
+    global _analysis_sema
+    if _analysis_sema is None:
+        _analysis_sema = asyncio.Semaphore(settings.MAX_CONCURRENT_ANALYSES)
+    return _analysis_sema
+
+async def _run_guarded(analysis_service, task_id: str, analysis):
+    """Run an analysis coroutine once a concurrency slot is free."""
+    sema = _get_analysis_sema()
+    if sema.locked():
+        await analysis_service.send_message(task_id, {
+            "type": "task.queued",
+            "task_id": task_id,
+            "current_step": "Waiting for a free analysis slot..."
+        })
+    
+    async with sema:
+        # The client may have left while queued; don't run for nobody
+        if task_id not in analysis_service.active_connections:
+            analysis.close()
+            return
+        await analysis
+
+async def _receive_iter(websocket: WebSocket):
+    """Yield client messages until the socket disconnects."""
+    while True:
+        yield await websocket.receive_text()
+
 @router.websocket("/ws/tasks/{task_id}")
 async def websocket_endpoint(websocket: WebSocket, task_id: str):
     """WebSocket endpoint for real-time analysis updates (legacy)."""
@@ -25,7 +60,7 @@ async def websocket_endpoint(websocket: WebSocket, task_id: str):
         
         # Wait for task parameters from client
         data = await websocket.receive_text()
-        task_params = json.loads(data)
+        task_params = orjson.loads(data)
         
         repository_url = task_params.get("repository_url")
         task_type = task_params.get("task_type", "explore-codebase")
@@ -42,25 +77,16 @@ async def websocket_endpoint(websocket: WebSocket, task_id: str):
         pr_options = task_params.get("pr_options")
         
         # Start the legacy analysis as a background task
-        asyncio.create_task(
+        asyncio.create_task(_run_guarded(
+            analysis_service, task_id,
             analysis_service.start_analysis(task_id, repository_url, task_type, pr_options)
-        )
+        ))
         
-        # Keep the WebSocket connection alive to receive messages
-        while True:
-            try:
-                # Wait for any additional messages from client (optional)
-                message = await asyncio.wait_for(websocket.receive_text(), timeout=1.0)
-                # Handle any additional client messages if needed
-                logger.debug(f"Received message from client {task_id}: {message}")
-            except asyncio.TimeoutError:
-                # Check if connection is still alive
-                if task_id not in analysis_service.active_connections:
-                    break
-                continue
-            except WebSocketDisconnect:
-                logger.info(f"Client {task_id} disconnected")
-                break
+        # Keep the WebSocket connection open; WebSocketDisconnect ends the loop
+        # and uvicorn's protocol-level pings detect dead peers
+        async for message in _receive_iter(websocket):
+            # Handle any additional client messages if needed
+            logger.debug(f"Received message from client {task_id}: {message}")
     
     except WebSocketDisconnect:
         logger.info(f"Client {task_id} disconnected")
@@ -90,7 +116,7 @@ async def smart_websocket_endpoint(websocket: WebSocket, task_id: str):
         
         # Wait for task parameters from client
         data = await websocket.receive_text()
-        task_params = json.loads(data)
+        task_params = orjson.loads(data)
         
         repository_url = task_params.get("repository_url")
         context = task_params.get("context", "explore codebase")
@@ -109,49 +135,39 @@ async def smart_websocket_endpoint(websocket: WebSocket, task_id: str):
             return
         
         # Start the smart analysis as a background task
-        asyncio.create_task(
+        asyncio.create_task(_run_guarded(
+            analysis_service, task_id,
             analysis_service.start_smart_analysis(
                 task_id, repository_url, context, intent, target_languages,
                 scope, depth, additional_params
             )
-        )
+        ))
         
-        # Keep the WebSocket connection alive to receive messages
-        while True:
+        # Keep the WebSocket connection open; WebSocketDisconnect ends the loop
+        # and uvicorn's protocol-level pings detect dead peers
+        async for message in _receive_iter(websocket):
+            # Handle any additional client messages if needed
+            logger.debug(f"Received message from smart client {task_id}: {message}")
+            
+            # Parse message for potential commands
             try:
-                # Wait for any additional messages from client (optional)
-                message = await asyncio.wait_for(websocket.receive_text(), timeout=1.0)
-                # Handle any additional client messages if needed
-                logger.debug(f"Received message from smart client {task_id}: {message}")
+                msg_data = orjson.loads(message)
+                msg_type = msg_data.get("type")
                 
-                # Parse message for potential commands
-                try:
-                    msg_data = json.loads(message)
-                    msg_type = msg_data.get("type")
-                    
-                    if msg_type == "cancel":
-                        # Handle cancellation request
-                        if task_id in analysis_service.active_tasks:
-                            analysis_service.active_tasks[task_id].cancel()
-                            await analysis_service.send_message(task_id, {
-                                "type": "task.cancelled",
-                                "task_id": task_id,
-                                "message": "Analysis cancelled by user"
-                            })
-                        break
-                    
-                except json.JSONDecodeError:
-                    # Not a JSON message, ignore
-                    pass
-                
-            except asyncio.TimeoutError:
-                # Check if connection is still alive
-                if task_id not in analysis_service.active_connections:
+                if msg_type == "cancel":
+                    # Handle cancellation request
+                    if task_id in analysis_service.active_tasks:
+                        analysis_service.active_tasks[task_id].cancel()
+                        await analysis_service.send_message(task_id, {
+                            "type": "task.cancelled",
+                            "task_id": task_id,
+                            "message": "Analysis cancelled by user"
+                        })
                     break
-                continue
-            except WebSocketDisconnect:
-                logger.info(f"Smart client {task_id} disconnected")
-                break
+                
+            except orjson.JSONDecodeError:
+                # Not a JSON message, ignore
+                pass
     
     except WebSocketDisconnect:
         logger.info(f"Smart client {task_id} disconnected")
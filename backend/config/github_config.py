@@ -4,6 +4,7 @@ GitHub Configuration for Pull Request Integration
 
 import os
 import logging
+import functools
 from typing import List, Optional
 from dataclasses import dataclass
 
@@ -51,10 +52,14 @@ class GitHubConfig:
             self.default_pr_labels = ["security", "dependencies", "automated"]
 
 
+@functools.cache
 def load_github_config() -> GitHubConfig:
     """
     Load GitHub configuration from environment variables.
     
+    The result is built on first call and shared afterwards; call
+    load_github_config.cache_clear() to re-read the environment.
+    
     Returns:
         GitHubConfig instance with loaded configuration
     """
@@ -91,7 +96,3 @@ def load_github_config() -> GitHubConfig:
                 f"Dry Run: {config.dry_run_mode}")
     
     return config
-
-
-# Global configuration instance
-github_config = load_github_config() 
\ No newline at end of file
@@ -17,6 +17,8 @@ class Settings:
     PORT: int = int(os.getenv("PORT", "8000"))
     RELOAD: bool = os.getenv("RELOAD", "true").lower() == "true"
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "info")
+    WS_PING_INTERVAL: float = float(os.getenv("WS_PING_INTERVAL", "20"))
+    WS_PING_TIMEOUT: float = float(os.getenv("WS_PING_TIMEOUT", "20"))
     
     # API Configuration
     API_TITLE: str = "Whisper API"
@@ -16,7 +16,7 @@ logger = get_logger(__name__)
 
 # Global variables
 analysis_service: AnalysisService = None
-start_time = time.time()
+start_time = time.monotonic()
 
 def create_app() -> FastAPI:
     """Create and configure the FastAPI application."""
@@ -43,6 +43,10 @@ def create_app() -> FastAPI:
     app.include_router(tasks.router, prefix="/api", tags=["tasks"])
     app.include_router(websocket.router, tags=["websocket"])
     
+    # Build the OpenAPI schema now; FastAPI caches it on app.openapi_schema,
+    # so the first /docs or /openapi.json request doesn't pay for it
+    app.openapi()
+    
     return app
 
 async def startup_event():
@@ -73,4 +77,4 @@ def get_analysis_service() -> AnalysisService:
 
 def get_uptime() -> float:
     """Get application uptime in seconds."""
-    return time.time() - start_time 
\ No newline at end of file
+    return time.monotonic() - start_time 
\ No newline at end of file
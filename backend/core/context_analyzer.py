@@ -7,7 +7,8 @@ analysis strategy and tool selection.
 
 import re
 import json
-from typing import Dict, List, Tuple, Optional
+import time
+from typing import Dict, FrozenSet, List, Tuple, Optional
 from dataclasses import dataclass
 
 from tools.base_tool import AnalysisContext
@@ -15,10 +16,15 @@ from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Only AI-parsed intents are cached, and only for this long
+INTENT_CACHE_TTL_SECONDS = 600
+INTENT_CACHE_MAX_ENTRIES = 512
+
 
 @dataclass
 class AnalysisAction:
     """Represents a single analysis action to be performed."""
+    __slots__ = ('intent', 'confidence', 'priority', 'reasoning')
     intent: str
     confidence: float
     priority: int  # 1 = highest priority, 2 = second highest, etc.
@@ -28,20 +34,13 @@ class AnalysisAction:
 @dataclass
 class ParsedIntent:
     """Result of intent parsing with multiple scalable actions."""
+    __slots__ = ('actions', 'overall_confidence', 'analysis_complexity', 'reasoning')
     actions: List[AnalysisAction]
     overall_confidence: float
     analysis_complexity: str  # "simple", "moderate", "complex"
     reasoning: str
 
 
-@dataclass
-class LanguageDetection:
-    """Result of language detection."""
-    detected_languages: List[str]
-    confidence_scores: Dict[str, float]
-    evidence: Dict[str, List[str]]
-
-
 class ContextAnalyzer:
     """
     Analyzes context from frontend requests to determine analysis strategy.
@@ -69,8 +68,51 @@ class ContextAnalyzer:
             "scala": [r"\bscala\b", r"\.scala$"]
         }
         
+        # Inputs are lowercased before matching, so no IGNORECASE is needed
+        self._compiled_lang_patterns = {
+            language: [re.compile(pattern) for pattern in patterns]
+            for language, patterns in self.language_patterns.items()
+        }
+        
+        # One combined pattern per language, used to skip languages with no hit at all
+        self._lang_regex = {
+            language: re.compile("|".join(f"(?:{p})" for p in patterns))
+            for language, patterns in self.language_patterns.items()
+        }
+        
+        # Scope and depth keywords, matched as substrings of the lowered context
+        self._security_kw_set = frozenset(["security", "vulnerability", "exploit", "threat"])
+        self._performance_kw_set = frozenset(["performance", "optimization", "bottleneck", "speed"])
+        self._surface_kw_set = frozenset(["quick", "brief", "overview", "summary", "fast"])
+        self._deep_kw_set = frozenset(["detailed", "thorough", "comprehensive", "in-depth", "complete"])
+        all_keywords = (
+            self._security_kw_set | self._performance_kw_set
+            | self._surface_kw_set | self._deep_kw_set
+        )
+        # Zero-width lookahead so overlapping keywords are all reported
+        self._keyword_regex = re.compile(
+            "(?=(" + "|".join(
+                re.escape(k) for k in sorted(all_keywords, key=len, reverse=True)
+            ) + "))"
+        )
+        
+        # Common file patterns, combined so the context is scanned once
+        file_patterns = [
+            r'go\.mod', r'go\.sum', r'package\.json', r'requirements\.txt',
+            r'Dockerfile', r'README\.md', r'\.gitignore',
+            r'\w+\.(?:go|py|js|ts|java|cpp|c|rs|rb|php)(?:\s|$|,|\.)',
+            r'[a-zA-Z0-9_-]+/[a-zA-Z0-9_.-]+\.[a-zA-Z]{1,4}'
+        ]
+        self._files_regex = re.compile(
+            "|".join(f"(?:{p})" for p in file_patterns), re.IGNORECASE
+        )
+        self._trailing_punct_regex = re.compile(r'[,.\s]+$')
+        
         # Initialize OpenAI client - will be set when needed
         self._llm = None
+        
+        # Repeat parses of the same context reuse the AI result: context -> (stored_at, intent)
+        self._intent_cache: Dict[str, Tuple[float, ParsedIntent]] = {}
     
     def _get_llm(self):
         """Get or initialize the OpenAI LLM client."""
@@ -97,7 +139,7 @@ class ContextAnalyzer:
         
         return self._llm
     
-    def analyze_context(
+    async def analyze_context(
         self, 
         context_text: str, 
         repository_url: str, 
@@ -116,15 +158,19 @@ class ContextAnalyzer:
         """
         logger.info(f"Analyzing context: {context_text[:100]}...")
         
-        # Parse intent from context using AI or fallback
-        parsed_intent = self._parse_intent(context_text)
+        # Parse intent from context using AI or fallback (needs the original casing)
+        parsed_intent = await self._parse_intent(context_text)
+        
+        # Lowercase once for every keyword and pattern match below
+        context_lower = context_text.lower()
         
         # Detect target languages
-        language_detection = self._detect_languages(context_text, repository_url)
+        target_languages = self._detect_languages(context_lower, repository_url.lower())
         
-        # Determine scope and depth
-        scope = self._determine_scope(context_text, parsed_intent)
-        depth = self._determine_depth(context_text, parsed_intent)
+        # Determine scope and depth from a single keyword scan
+        keyword_hits = self._scan(context_lower)
+        scope = self._determine_scope(keyword_hits, parsed_intent)
+        depth = self._determine_depth(keyword_hits, parsed_intent)
         
         # Extract specific files if mentioned
         specific_files = self._extract_specific_files(context_text)
@@ -133,7 +179,7 @@ class ContextAnalyzer:
             repository_path="",  # Will be set when repository is cloned
             repository_url=repository_url,
             intent=parsed_intent.actions[0].intent,
-            target_languages=language_detection.detected_languages,
+            target_languages=target_languages,
             scope=scope,
             specific_files=specific_files,
             depth=depth,
@@ -289,7 +335,7 @@ Guidelines:
             reasoning="AI intent analysis unavailable, using basic exploration fallback"
         )
     
-    def _parse_intent(self, context_text: str) -> ParsedIntent:
+    async def _parse_intent(self, context_text: str) -> ParsedIntent:
         """
         Parse the primary intent from context text using AI or fallback.
         
@@ -299,13 +345,17 @@ Guidelines:
         Returns:
             ParsedIntent object with analysis results
         """
+        cached = self._intent_cache.get(context_text)
+        if cached is not None and time.monotonic() - cached[0] < INTENT_CACHE_TTL_SECONDS:
+            return cached[1]
+        
         # Try AI-based parsing first
         try:
             logger.debug(f"Attempting AI intent parsing for: '{context_text}'")
-            import asyncio
-            ai_result = asyncio.run(self._parse_intent_with_ai(context_text))
+            ai_result = await self._parse_intent_with_ai(context_text)
             if ai_result:
                 logger.info(f"AI intent parsing successful: {ai_result.actions[0].intent} (confidence: {ai_result.overall_confidence})")
+                self._store_intent(context_text, ai_result)
                 return ai_result
             else:
                 logger.debug("AI intent parsing returned None, falling back to rule-based")
@@ -315,84 +365,77 @@ Guidelines:
             import traceback
             logger.debug(f"Traceback: {traceback.format_exc()}")
         
-        # Fall back to rule-based parsing
+        # Fall back to rule-based parsing; not cached, so the AI is retried next time
         logger.info("Using fallback rule-based intent parsing")
         return self._parse_intent_fallback(context_text)
     
-    def _detect_languages(self, context_text: str, repository_url: str) -> LanguageDetection:
+    def _store_intent(self, context_text: str, parsed_intent: ParsedIntent):
+        """Cache an AI-parsed intent, evicting the oldest entry when full."""
+        self._intent_cache.pop(context_text, None)
+        if len(self._intent_cache) >= INTENT_CACHE_MAX_ENTRIES:
+            del self._intent_cache[next(iter(self._intent_cache))]
+        self._intent_cache[context_text] = (time.monotonic(), parsed_intent)
+    
+    def _detect_languages(self, context_lower: str, repo_url_lower: str) -> List[str]:
         """
         Detect target programming languages from context and repository URL.
         
         Args:
-            context_text: Context text to analyze
-            repository_url: Repository URL for additional clues
+            context_lower: Lowercased context text to analyze
+            repo_url_lower: Lowercased repository URL for additional clues
             
         Returns:
-            LanguageDetection object with results
+            Languages with confidence above 0.3
         """
-        context_lower = context_text.lower()
-        repo_url_lower = repository_url.lower()
-        
         language_scores = {}
-        language_evidence = {}
-        
-        for language, patterns in self.language_patterns.items():
-            score = 0
-            evidence = []
+        max_score = 0
+        
+        for language, patterns in self._compiled_lang_patterns.items():
+            lang_regex = self._lang_regex[language]
+            if (
+                language not in context_lower
+                and not lang_regex.search(context_lower)
+                and not lang_regex.search(repo_url_lower)
+            ):
+                continue
             
-            for pattern in patterns:
-                # Check in context text
-                if re.search(pattern, context_lower):
+            score = 3 if language in context_lower else 0
+            for regex in patterns:
+                if regex.search(context_lower):
                     score += 2
-                    evidence.append(f"Found '{pattern}' in context")
-                
-                # Check in repository URL
-                if re.search(pattern, repo_url_lower):
+                if regex.search(repo_url_lower):
                     score += 1
-                    evidence.append(f"Found '{pattern}' in repository URL")
-            
-            # Check for explicit language mentions
-            if language in context_lower:
-                score += 3
-                evidence.append(f"Explicit mention of {language}")
             
             if score > 0:
                 language_scores[language] = score
-                language_evidence[language] = evidence
-        
-        # Convert scores to confidence percentages
-        if language_scores:
-            max_score = max(language_scores.values())
-            confidence_scores = {
-                lang: score / max_score for lang, score in language_scores.items()
-            }
-            # Only include languages with confidence > 0.3
-            detected_languages = [
-                lang for lang, conf in confidence_scores.items() if conf > 0.3
-            ]
-        else:
-            confidence_scores = {}
-            detected_languages = []
-        
-        return LanguageDetection(
-            detected_languages=detected_languages,
-            confidence_scores=confidence_scores,
-            evidence=language_evidence
-        )
+                if score > max_score:
+                    max_score = score
+        
+        return [lang for lang, score in language_scores.items() if score / max_score > 0.3]
+    
+    def _scan(self, context_lower: str) -> FrozenSet[str]:
+        """
+        Scan lowered context once for all scope and depth keywords.
+        
+        Args:
+            context_lower: Lowercased context text
+            
+        Returns:
+            Set of keywords found in the context
+        """
+        return frozenset(self._keyword_regex.findall(context_lower))
     
-    def _determine_scope(self, context_text: str, parsed_intent: ParsedIntent) -> str:
+    def _determine_scope(self, keyword_hits: FrozenSet[str], parsed_intent: ParsedIntent) -> str:
         """
         Determine analysis scope from context.
         
         Args:
-            context_text: Context text
+            keyword_hits: Keywords found by _scan
             parsed_intent: Parsed intent information
             
         Returns:
             Scope string ("full", "security_focused", "performance_focused")
         """
-        context_lower = context_text.lower()
-        
         # Intent-based scope determination
         if parsed_intent.actions[0].intent in ["find_vulnerabilities", "security_audit"]:
             return "security_focused"
@@ -400,36 +443,27 @@ Guidelines:
             return "performance_focused"
         
         # Keyword-based scope determination
-        security_keywords = ["security", "vulnerability", "exploit", "threat"]
-        performance_keywords = ["performance", "optimization", "bottleneck", "speed"]
-        
-        if any(keyword in context_lower for keyword in security_keywords):
+        if keyword_hits & self._security_kw_set:
             return "security_focused"
-        elif any(keyword in context_lower for keyword in performance_keywords):
+        elif keyword_hits & self._performance_kw_set:
             return "performance_focused"
         
         return "full"
     
-    def _determine_depth(self, context_text: str, parsed_intent: ParsedIntent) -> str:
+    def _determine_depth(self, keyword_hits: FrozenSet[str], parsed_intent: ParsedIntent) -> str:
         """
         Determine analysis depth from context.
         
         Args:
-            context_text: Context text
+            keyword_hits: Keywords found by _scan
             parsed_intent: Parsed intent information
             
         Returns:
             Depth string ("surface", "deep", "comprehensive")
         """
-        context_lower = context_text.lower()
-        
-        # Depth indicators
-        surface_keywords = ["quick", "brief", "overview", "summary", "fast"]
-        deep_keywords = ["detailed", "thorough", "comprehensive", "in-depth", "complete"]
-        
-        if any(keyword in context_lower for keyword in surface_keywords):
+        if keyword_hits & self._surface_kw_set:
             return "surface"
-        elif any(keyword in context_lower for keyword in deep_keywords):
+        elif keyword_hits & self._deep_kw_set:
             return "comprehensive"
         
         # Default based on intent
@@ -448,28 +482,16 @@ Guidelines:
         Returns:
             List of specific files mentioned
         """
-        # Common file patterns
-        file_patterns = [
-            r'go\.mod', r'go\.sum', r'package\.json', r'requirements\.txt',
-            r'Dockerfile', r'README\.md', r'\.gitignore',
-            r'\w+\.(go|py|js|ts|java|cpp|c|rs|rb|php)(?:\s|$|,|\.)',
-            r'[a-zA-Z0-9_-]+/[a-zA-Z0-9_.-]+\.[a-zA-Z]{1,4}'
-        ]
-        
         specific_files = []
-        for pattern in file_patterns:
-            matches = re.findall(pattern, context_text, re.IGNORECASE)
-            specific_files.extend(matches)
-        
-        # Clean up the matches
-        cleaned_files = []
-        for file_match in specific_files:
+        seen = set()
+        for match in self._files_regex.finditer(context_text):
             # Remove trailing punctuation
-            cleaned = re.sub(r'[,.\s]+$', '', file_match)
-            if cleaned and cleaned not in cleaned_files:
-                cleaned_files.append(cleaned)
+            cleaned = self._trailing_punct_regex.sub('', match.group(0))
+            if cleaned and cleaned not in seen:
+                seen.add(cleaned)
+                specific_files.append(cleaned)
         
-        return cleaned_files
+        return specific_files
     
     def enhance_context_with_repository_info(
         self, 
@@ -499,4 +521,8 @@ Guidelines:
             additional_params=context.additional_params
         )
         
-        return enhanced_context 
\ No newline at end of file
+        return enhanced_context
+
+
+# Shared analyzer: patterns compile and the analysis cache fills once per process
+context_analyzer = ContextAnalyzer()
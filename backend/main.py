@@ -31,6 +31,8 @@ def main():
         port=settings.PORT,
         reload=settings.RELOAD,
         log_level=settings.LOG_LEVEL,
+        ws_ping_interval=settings.WS_PING_INTERVAL,
+        ws_ping_timeout=settings.WS_PING_TIMEOUT,
         access_log=True
     )
 
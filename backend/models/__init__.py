@@ -7,6 +7,7 @@ from .api_models import (
     AnalysisResponse,
     TaskStatus,
     ProgressUpdate,
+    ProgressMessage,
     FileStructure,
     LanguageAnalysis,
     MainComponent,
@@ -24,6 +25,7 @@ __all__ = [
     'AnalysisResponse', 
     'TaskStatus',
     'ProgressUpdate',
+    'ProgressMessage',
     'FileStructure',
     'LanguageAnalysis',
     'MainComponent',
@@ -1,41 +1,58 @@
 """
 API Models - Pydantic models for request/response validation
+
+Models built by the backend from trusted data may use model_construct();
+anything parsed from HTTP requests or LLM output is validated normally.
 """
 
-from typing import Dict, List, Any, Optional
-from pydantic import BaseModel, Field, field_validator
-import re
+from typing import Annotated, Dict, List, Any, Literal, Optional, TypedDict
+from pydantic import AfterValidator, BaseModel, BeforeValidator, ConfigDict, Field, StringConstraints, field_validator
+
+def _strip_trailing_slashes(v):
+    """Normalize repository URLs before the pattern check."""
+    return v.rstrip('/') if isinstance(v, str) else v
+
+# GitHub repository URL (https://github.com/owner/repo); the pattern runs in pydantic-core.
+# The BeforeValidator comes last so it wraps the constrained str and the pattern stays in the schema.
+RepoUrl = Annotated[
+    str,
+    StringConstraints(pattern=r'^https://github\.com/[a-zA-Z0-9\-_.]+/[a-zA-Z0-9\-_.]+$'),
+    BeforeValidator(_strip_trailing_slashes),
+    Field(description="GitHub repository URL"),
+]
+
+# Optional GitHub token supplied by the client
+GitHubToken = Annotated[Optional[str], Field(description="GitHub token (falls back to the server environment)")]
+
+def clamp_progress(p: float) -> float:
+    """Clamp a progress percentage into [0, 100] instead of rejecting it."""
+    return 0.0 if p < 0 else 100.0 if p > 100 else p
+
+# Progress percentage; out-of-range values from our own emitters are clamped
+Progress = Annotated[float, AfterValidator(clamp_progress), Field(description="Progress percentage")]
+
+# Analysis task types; validated by pydantic-core as a Literal
+TaskType = Literal['explore-codebase', 'dependency-audit']
+
+# Allowed enum-like values, kept in display order for error messages
+_SCOPE_CHOICES = ('full', 'security_focused', 'performance_focused')
+_DEPTH_CHOICES = ('surface', 'deep', 'comprehensive')
+_VALID_SCOPES = frozenset(_SCOPE_CHOICES)
+_VALID_DEPTHS = frozenset(_DEPTH_CHOICES)
+_SCOPE_ERROR = f"Scope must be one of: {', '.join(_SCOPE_CHOICES)}"
+_DEPTH_ERROR = f"Depth must be one of: {', '.join(_DEPTH_CHOICES)}"
 
 class AnalysisRequest(BaseModel):
     """Request model for repository analysis."""
-    repository_url: str = Field(..., description="GitHub repository URL")
-    task_type: str = Field(default="explore-codebase", description="Type of analysis task")
-    github_token: Optional[str] = Field(None, description="GitHub token for private repositories")
+    repository_url: RepoUrl
+    task_type: TaskType = Field(default="explore-codebase", description="Type of analysis task")
+    github_token: GitHubToken = None
     pr_options: Optional[Dict[str, Any]] = Field(None, description="Options for PR creation (only used with dependency-audit task type)")
-    
-    @field_validator('repository_url')
-    @classmethod
-    def validate_repository_url(cls, v):
-        """Validate that the repository URL is a valid GitHub URL."""
-        # More flexible pattern to handle various GitHub URL formats
-        github_pattern = r'^https://github\.com/[a-zA-Z0-9\-_\.]+/[a-zA-Z0-9\-_\.]+/?$'
-        if not re.match(github_pattern, v.rstrip('/')):
-            raise ValueError('Must be a valid GitHub repository URL (https://github.com/owner/repo)')
-        return v.rstrip('/')
-    
-    @field_validator('task_type')
-    @classmethod
-    def validate_task_type(cls, v):
-        """Validate task type."""
-        valid_types = ['explore-codebase', 'dependency-audit']
-        if v not in valid_types:
-            raise ValueError(f'Task type must be one of: {", ".join(valid_types)}')
-        return v
 
 # New smart analysis models
 class SmartAnalysisRequest(BaseModel):
     """Request model for smart context-based analysis."""
-    repository_url: str = Field(..., description="GitHub repository URL")
+    repository_url: RepoUrl
     context: str = Field(..., description="Natural language description of what to analyze")
     intent: Optional[str] = Field(None, description="Explicit intent override")
     target_languages: Optional[List[str]] = Field(None, description="Target programming languages")
@@ -43,31 +60,20 @@ class SmartAnalysisRequest(BaseModel):
     depth: Optional[str] = Field("comprehensive", description="Analysis depth: surface, deep, comprehensive")
     additional_params: Optional[Dict[str, Any]] = Field(None, description="Additional parameters")
     
-    @field_validator('repository_url')
-    @classmethod
-    def validate_repository_url(cls, v):
-        """Validate that the repository URL is a valid GitHub URL."""
-        github_pattern = r'^https://github\.com/[a-zA-Z0-9\-_\.]+/[a-zA-Z0-9\-_\.]+/?$'
-        if not re.match(github_pattern, v.rstrip('/')):
-            raise ValueError('Must be a valid GitHub repository URL (https://github.com/owner/repo)')
-        return v.rstrip('/')
-    
     @field_validator('scope')
     @classmethod
     def validate_scope(cls, v):
         """Validate analysis scope."""
-        valid_scopes = ["full", "security_focused", "performance_focused"]
-        if v not in valid_scopes:
-            raise ValueError(f'Scope must be one of: {", ".join(valid_scopes)}')
+        if v not in _VALID_SCOPES:
+            raise ValueError(_SCOPE_ERROR)
         return v
     
     @field_validator('depth')
     @classmethod
     def validate_depth(cls, v):
         """Validate analysis depth."""
-        valid_depths = ["surface", "deep", "comprehensive"]
-        if v not in valid_depths:
-            raise ValueError(f'Depth must be one of: {", ".join(valid_depths)}')
+        if v not in _VALID_DEPTHS:
+            raise ValueError(_DEPTH_ERROR)
         return v
 
 class AnalysisResponse(BaseModel):
@@ -100,9 +106,18 @@ class ProgressUpdate(BaseModel):
     type: str = Field(..., description="Message type")
     task_id: str = Field(..., description="Task identifier")
     current_step: str = Field(..., description="Current analysis step")
-    progress: float = Field(..., ge=0, le=100, description="Progress percentage")
+    progress: Progress
     partial_results: Dict[str, Any] = Field(default_factory=dict, description="Partial analysis results")
 
+class ProgressMessage(TypedDict):
+    """Plain-dict form of ProgressUpdate used on the WebSocket hot path (no model instantiation)."""
+    type: str
+    task_id: str
+    current_step: str
+    progress: float
+    previous_progress: float
+    partial_results: Dict[str, Any]
+
 class ExecutionPlan(BaseModel):
     """Model for analysis execution plan."""
     total_tools: int
@@ -176,25 +191,31 @@ class WhisperAnalysisResults(BaseModel):
 class AnalysisResults(BaseModel):
     """Model for complete analysis results."""
     summary: str = Field(..., description="Analysis summary")
-    statistics: Dict[str, Any] = Field(..., description="Key statistics")
+    statistics: Dict[str, int] = Field(..., description="Key statistics (display label -> count)")
     detailed_results: Dict[str, Any] = Field(..., description="Detailed analysis results")
 
 class TaskCompletedMessage(BaseModel):
     """Model for task completion message."""
-    type: str = Field(default="task.completed")
+    model_config = ConfigDict(frozen=True, defer_build=True)
+
+    type: Literal["task.completed"] = Field(default="task.completed")
     task_id: str
     results: AnalysisResults
 
 class TaskErrorMessage(BaseModel):
     """Model for task error message."""
-    type: str = Field(default="task.error")
+    model_config = ConfigDict(frozen=True, defer_build=True)
+
+    type: Literal["task.error"] = Field(default="task.error")
     task_id: str
     error: str
     error_code: Optional[str] = None
 
 class TaskStartedMessage(BaseModel):
     """Model for task started message."""
-    type: str = Field(default="task.started")
+    model_config = ConfigDict(frozen=True)
+
+    type: Literal["task.started"] = Field(default="task.started")
     task_id: str
     status: str = Field(default="running")
     repository_url: str
@@ -202,7 +223,9 @@ class TaskStartedMessage(BaseModel):
 
 class SmartTaskStartedMessage(BaseModel):
     """Model for smart task started message."""
-    type: str = Field(default="smart_task.started")
+    model_config = ConfigDict(frozen=True)
+
+    type: Literal["smart_task.started"] = Field(default="smart_task.started")
     task_id: str
     status: str = Field(default="running")
     repository_url: str
@@ -211,7 +234,9 @@ class SmartTaskStartedMessage(BaseModel):
 
 class SmartTaskCompletedMessage(BaseModel):
     """Model for smart task completion message."""
-    type: str = Field(default="smart_task.completed")
+    model_config = ConfigDict(frozen=True, defer_build=True)
+
+    type: Literal["smart_task.completed"] = Field(default="smart_task.completed")
     task_id: str
     results: SmartAnalysisResults
     execution_time: float
@@ -219,7 +244,9 @@ class SmartTaskCompletedMessage(BaseModel):
 
 class ToolCompletedMessage(BaseModel):
     """Model for individual tool completion message."""
-    type: str = Field(default="tool.completed")
+    model_config = ConfigDict(frozen=True)
+
+    type: Literal["tool.completed"] = Field(default="tool.completed")
     task_id: str
     tool_name: str
     tool_result: ToolExecutionResult
@@ -291,21 +318,25 @@ class GitHubServiceStatus(BaseModel):
 class EnhancedAnalysisResults(BaseModel):
     """Enhanced analysis results with GitHub PR information."""
     summary: str = Field(..., description="Analysis summary")
-    statistics: Dict[str, Any] = Field(..., description="Key statistics")
+    statistics: Dict[str, int] = Field(..., description="Key statistics (display label -> count)")
     detailed_results: Dict[str, Any] = Field(..., description="Detailed analysis results")
     github_pr: Optional[GitHubPRResult] = Field(None, description="GitHub PR creation result")
 
 
 class GitHubPRProgressMessage(BaseModel):
     """WebSocket message for GitHub PR creation progress."""
-    type: str = Field(default="github_pr.progress", description="Message type")
+    model_config = ConfigDict(frozen=True)
+
+    type: Literal["github_pr.progress"] = Field(default="github_pr.progress", description="Message type")
     task_id: str = Field(..., description="Task ID")
     step: str = Field(..., description="Current PR creation step")
-    progress: float = Field(..., ge=0, le=100, description="Progress percentage")
+    progress: Progress
 
 
 class GitHubPRCompletedMessage(BaseModel):
     """WebSocket message for completed GitHub PR creation."""
-    type: str = Field(default="github_pr.completed", description="Message type")
+    model_config = ConfigDict(frozen=True, defer_build=True)
+
+    type: Literal["github_pr.completed"] = Field(default="github_pr.completed", description="Message type")
     task_id: str = Field(..., description="Task ID")
     pr_result: GitHubPRResult = Field(..., description="PR creation result") 
\ No newline at end of file
@@ -2,9 +2,10 @@
 GitHub-specific API Models for Pull Request Integration
 """
 
-from typing import Dict, List, Any, Optional
-from pydantic import BaseModel, Field
-from dataclasses import dataclass
+from typing import Annotated, Dict, List, Any, Literal, Optional
+from pydantic import BaseModel, ConfigDict, Field
+
+from models.api_models import GitHubToken, Progress, RepoUrl, TaskType
 
 
 class GitHubPROptions(BaseModel):
@@ -28,6 +29,10 @@ class GitHubPRResult(BaseModel):
     error_message: Optional[str] = Field(None, description="Error message if creation failed")
 
 
+# PR creation options shared by the request models
+PROptions = Annotated[Optional[GitHubPROptions], Field(description="Pull request creation options")]
+
+
 class RepositoryAccessInfo(BaseModel):
     """Information about repository access permissions."""
     has_write_access: bool = Field(..., description="Whether user has write access to repository")
@@ -49,9 +54,9 @@ class VulnerabilityFix(BaseModel):
 
 class SecurityPRRequest(BaseModel):
     """Request to create a security pull request."""
-    repository_url: str = Field(..., description="GitHub repository URL")
+    repository_url: RepoUrl
     vulnerability_fixes: List[VulnerabilityFix] = Field(..., description="List of vulnerability fixes to apply")
-    pr_options: Optional[GitHubPROptions] = Field(None, description="Pull request creation options")
+    pr_options: PROptions = None
     dry_run: bool = Field(default=False, description="Perform dry run without creating actual PR")
 
 
@@ -85,13 +90,14 @@ class GitHubServiceStatus(BaseModel):
 
 class EnhancedAnalysisRequest(BaseModel):
     """Enhanced analysis request with GitHub PR creation options."""
-    repository_url: str = Field(..., description="GitHub repository URL")
-    task_type: str = Field(default="dependency-audit", description="Type of analysis to perform")
-    github_token: Optional[str] = Field(None, description="GitHub token (if not in environment)")
-    pr_options: Optional[GitHubPROptions] = Field(None, description="PR creation options (only used with dependency-audit task type)")
-    
-    class Config:
-        schema_extra = {
+    repository_url: RepoUrl
+    task_type: TaskType = Field(default="dependency-audit", description="Type of analysis to perform")
+    github_token: GitHubToken = None
+    pr_options: PROptions = None
+
+    model_config = ConfigDict(
+        extra='forbid',
+        json_schema_extra={
             "example": {
                 "repository_url": "https://github.com/example/go-project",
                 "task_type": "dependency-audit",
@@ -102,7 +108,8 @@ class EnhancedAnalysisRequest(BaseModel):
                     "draft": False
                 }
             }
-        }
+        },
+    )
 
 
 class EnhancedAnalysisResponse(BaseModel):
@@ -113,9 +120,10 @@ class EnhancedAnalysisResponse(BaseModel):
     websocket_url: str = Field(..., description="WebSocket URL for progress updates")
     analysis_results: Optional[Dict[str, Any]] = Field(None, description="Analysis results")
     github_pr: Optional[GitHubPRResult] = Field(None, description="GitHub PR creation result")
-    
-    class Config:
-        schema_extra = {
+
+    model_config = ConfigDict(
+        frozen=True,
+        json_schema_extra={
             "example": {
                 "task_id": "task_123456",
                 "status": "completed",
@@ -137,30 +145,37 @@ class EnhancedAnalysisResponse(BaseModel):
                     "vulnerabilities_fixed": 3
                 }
             }
-        }
+        },
+    )
 
 
 # WebSocket message models for GitHub PR progress
 
 class GitHubPRProgressMessage(BaseModel):
     """WebSocket message for GitHub PR creation progress."""
-    type: str = Field(default="github_pr.progress", description="Message type")
+    model_config = ConfigDict(frozen=True)
+
+    type: Literal["github_pr.progress"] = Field(default="github_pr.progress", description="Message type")
     task_id: str = Field(..., description="Task ID")
     step: str = Field(..., description="Current step in PR creation")
-    progress: float = Field(..., ge=0, le=100, description="Progress percentage")
+    progress: Progress
     details: Optional[str] = Field(None, description="Additional details")
 
 
 class GitHubPRCompletedMessage(BaseModel):
     """WebSocket message for completed GitHub PR creation."""
-    type: str = Field(default="github_pr.completed", description="Message type") 
+    model_config = ConfigDict(frozen=True, defer_build=True)
+
+    type: Literal["github_pr.completed"] = Field(default="github_pr.completed", description="Message type") 
     task_id: str = Field(..., description="Task ID")
     pr_result: GitHubPRResult = Field(..., description="PR creation result")
 
 
 class GitHubPRErrorMessage(BaseModel):
     """WebSocket message for GitHub PR creation errors."""
-    type: str = Field(default="github_pr.error", description="Message type")
+    model_config = ConfigDict(frozen=True, defer_build=True)
+
+    type: Literal["github_pr.error"] = Field(default="github_pr.error", description="Message type")
     task_id: str = Field(..., description="Task ID")
     error: str = Field(..., description="Error message")
     step: Optional[str] = Field(None, description="Step where error occurred")
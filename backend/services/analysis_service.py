@@ -3,18 +3,96 @@ Analysis Service - Manages repository analysis tasks and WebSocket connections
 """
 
 import asyncio
-import json
 import uuid
-from typing import Dict, Any, Optional
+import orjson
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple, Union
 from fastapi import WebSocket
+from pydantic import BaseModel
 import logging
 
 from agents.whisper_analysis_agent import WhisperAnalysisAgent
 from agents.smart_analysis_agent import SmartAnalysisAgent
 from core.tool_registry import get_tool_registry, initialize_tool_registry
+from models.api_models import ProgressMessage
 
 logger = logging.getLogger(__name__)
 
+# High-rate updates that may be coalesced; everything else flushes immediately
+BATCHED_MESSAGE_TYPES = frozenset({"task.progress", "task.insight_chunk", "progress"})
+
+# Final-result messages whose (large) payloads are encoded off the event loop
+OFFLOADED_MESSAGE_TYPES = frozenset({"task.completed", "completed"})
+
+# Shared read-only default for missing dict fields; never mutate it
+_EMPTY_DICT: Dict[str, Any] = {}
+
+# Result sections read by AnalysisService._summarize, in unpacking order
+_SUMMARY_KEYS = ("language_analysis", "file_structure", "main_components", "architecture_patterns", "dependencies")
+
+@dataclass
+class TaskMeta:
+    """Configuration of a created (legacy) analysis task."""
+    __slots__ = ('repository_url', 'task_type', 'pr_options')
+    repository_url: str
+    task_type: str
+    pr_options: Dict[str, Any]
+
+class BatchingSender:
+    """Coalesces rapid updates on one WebSocket into a single JSON frame."""
+    
+    def __init__(self, websocket: WebSocket, flush_ms: int = 50, max_batch: int = 32):
+        self.ws = websocket
+        self.flush_ms = flush_ms
+        self.max_batch = max_batch
+        self.buf: List[Dict[str, Any]] = []
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+    
+    def enqueue(self, message: Dict[str, Any]):
+        """Buffer a message until the next flush, at most flush_ms from now."""
+        self.buf.append(message)
+        if self._task is None:
+            self._task = asyncio.create_task(self._flusher())
+    
+    async def send_now(self, message: Dict[str, Any]):
+        """Send a message together with anything still buffered ahead of it."""
+        self.buf.append(message)
+        await self.flush()
+    
+    async def flush(self):
+        """Send buffered messages, at most max_batch per frame; a lone message goes out unwrapped."""
+        async with self._lock:
+            if not self.buf:
+                return
+            pending, self.buf = self.buf, []
+            for i in range(0, len(pending), self.max_batch):
+                batch = pending[i:i + self.max_batch]
+                frame = batch[0] if len(batch) == 1 else batch
+                if any(m.get("type") in OFFLOADED_MESSAGE_TYPES for m in batch):
+                    # Full analysis results can be large; don't block other connections
+                    payload = await asyncio.to_thread(orjson.dumps, frame, option=orjson.OPT_NON_STR_KEYS)
+                else:
+                    payload = orjson.dumps(frame, option=orjson.OPT_NON_STR_KEYS)
+                # Text frames: browsers deliver binary frames as Blobs, not strings
+                await self.ws.send_text(payload.decode())
+    
+    async def _flusher(self):
+        await asyncio.sleep(self.flush_ms / 1000)
+        self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error("Failed to flush batched messages: %s", e)
+    
+    def close(self):
+        """Stop the pending flush; buffered messages are dropped."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.buf.clear()
+
 class AnalysisService:
     """Service to manage repository analysis tasks and WebSocket connections."""
     
@@ -24,19 +102,30 @@ class AnalysisService:
         self.smart_agent = SmartAnalysisAgent(openai_api_key=openai_api_key)
         
         self.active_connections: Dict[str, WebSocket] = {}
+        self.senders: Dict[str, BatchingSender] = {}
         self.active_tasks: Dict[str, asyncio.Task] = {}
-        self.task_metadata: Dict[str, Dict[str, Any]] = {}  # Store task configuration
-        self._initialized = False
+        self.task_metadata: Dict[str, TaskMeta] = {}  # Store task configuration
+        self._init_task: Optional[asyncio.Task] = None
         
     async def initialize(self):
-        """Initialize the analysis service and tool registry."""
-        if self._initialized:
-            return
+        """Initialize the analysis service and tool registry; concurrent callers share one run."""
+        if self._init_task is None:
+            self._init_task = asyncio.create_task(self._initialize())
         
+        init_task = self._init_task
+        try:
+            # Shielded so a cancelled caller doesn't cancel initialization for everyone
+            await asyncio.shield(init_task)
+        except Exception:
+            # Allow a later call to retry after a failed initialization
+            if self._init_task is init_task and init_task.done():
+                self._init_task = None
+            raise
+    
+    async def _initialize(self):
+        """Run the one-time initialization steps."""
         # Initialize tool registry
         await initialize_tool_registry()
-        
-        self._initialized = True
         logger.info("Analysis service initialized successfully")
         
     async def create_task(
@@ -49,13 +138,13 @@ class AnalysisService:
         task_id = str(uuid.uuid4())
         
         # Store task metadata (not overwriting active_tasks which stores asyncio.Task objects)
-        self.task_metadata[task_id] = {
-            "repository_url": repository_url,
-            "task_type": task_type,
-            "pr_options": pr_options or {}
-        }
+        self.task_metadata[task_id] = TaskMeta(
+            repository_url=repository_url,
+            task_type=task_type,
+            pr_options=pr_options or {}
+        )
         
-        logger.info(f"Created analysis task {task_id} for repository: {repository_url}")
+        logger.info("Created analysis task %s for repository: %s", task_id, repository_url)
         return task_id
     
     async def create_smart_task(
@@ -70,41 +159,63 @@ class AnalysisService:
     ) -> str:
         """Create a new smart analysis task and return task ID."""
         task_id = str(uuid.uuid4())
-        logger.info(f"Created smart analysis task {task_id} for repository: {repository_url}")
-        logger.info(f"Context: {context[:100]}...")
+        logger.info("Created smart analysis task %s for repository: %s", task_id, repository_url)
+        logger.info("Context: %s...", context[:100])
         return task_id
     
     async def connect_websocket(self, task_id: str, websocket: WebSocket):
         """Connect a WebSocket for real-time updates."""
         await websocket.accept()
         self.active_connections[task_id] = websocket
-        logger.info(f"WebSocket connected for task {task_id}")
+        self.senders[task_id] = BatchingSender(websocket)
+        logger.info("WebSocket connected for task %s", task_id)
     
     async def disconnect_websocket(self, task_id: str):
         """Disconnect and cleanup WebSocket connection."""
-        if task_id in self.active_connections:
-            del self.active_connections[task_id]
+        self.active_connections.pop(task_id, None)
+        self.task_metadata.pop(task_id, None)
+        sender = self.senders.pop(task_id, None)
+        task = self.active_tasks.pop(task_id, None)
         
-        # Cancel any running task
-        if task_id in self.active_tasks:
-            task = self.active_tasks[task_id]
-            if isinstance(task, asyncio.Task):
-                task.cancel()
-            del self.active_tasks[task_id]
+        if sender is not None:
+            sender.close()
         
-        # Clean up task metadata
-        if task_id in self.task_metadata:
-            del self.task_metadata[task_id]
+        # Cancel any running task
+        if task is not None:
+            task.cancel()
         
-        logger.info(f"WebSocket disconnected for task {task_id}")
+        logger.info("WebSocket disconnected for task %s", task_id)
     
-    async def send_message(self, task_id: str, message: Dict[str, Any]):
-        """Send a message to the WebSocket client."""
-        if task_id in self.active_connections:
+    @asynccontextmanager
+    async def _track_task(self, task_id: str, task: asyncio.Task, label: str):
+        """Track the task running an analysis and log how the analysis ended."""
+        self.active_tasks[task_id] = task
+        try:
+            yield task
+        except asyncio.CancelledError:
+            logger.info("%s task %s was cancelled", label, task_id)
+            raise
+        except Exception as e:
+            logger.error("%s task %s failed: %s", label, task_id, e)
+        finally:
+            # Only drop the entry if it still refers to this task
+            if self.active_tasks.get(task_id) is task:
+                del self.active_tasks[task_id]
+    
+    async def send_message(self, task_id: str, message: Union[Dict[str, Any], BaseModel]):
+        """Send a message (dict or pydantic message model) to the WebSocket client."""
+        sender = self.senders.get(task_id)
+        if sender is not None:
             try:
-                await self.active_connections[task_id].send_text(json.dumps(message))
+                if isinstance(message, BaseModel):
+                    # Plain dict so orjson encodes it along with the rest of the batch
+                    message = message.model_dump(mode="json")
+                if message.get("type") in BATCHED_MESSAGE_TYPES:
+                    sender.enqueue(message)
+                else:
+                    await sender.send_now(message)
             except Exception as e:
-                logger.error(f"Failed to send message to {task_id}: {e}")
+                logger.error("Failed to send message to %s: %s", task_id, e)
                 await self.disconnect_websocket(task_id)
     
     async def start_analysis(
@@ -116,22 +227,9 @@ class AnalysisService:
     ):
         """Start repository analysis with real-time updates (legacy method)."""
         
-        # Create and track the analysis task
-        analysis_task = asyncio.create_task(
-            self._run_legacy_analysis(task_id, repository_url, task_type, pr_options)
-        )
-        self.active_tasks[task_id] = analysis_task
-        
-        try:
-            await analysis_task
-        except asyncio.CancelledError:
-            logger.info(f"Analysis task {task_id} was cancelled")
-        except Exception as e:
-            logger.error(f"Analysis task {task_id} failed: {e}")
-        finally:
-            # Cleanup
-            if task_id in self.active_tasks:
-                del self.active_tasks[task_id]
+        # Run inline; the current task is tracked so disconnect_websocket can cancel it
+        async with self._track_task(task_id, asyncio.current_task(), "Analysis"):
+            await self._run_legacy_analysis(task_id, repository_url, task_type, pr_options)
     
     async def start_smart_analysis(
         self, 
@@ -149,25 +247,12 @@ class AnalysisService:
         # Ensure service is initialized
         await self.initialize()
         
-        # Create and track the smart analysis task
-        analysis_task = asyncio.create_task(
-            self._run_smart_analysis(
+        # Run inline; the current task is tracked so disconnect_websocket can cancel it
+        async with self._track_task(task_id, asyncio.current_task(), "Smart analysis"):
+            await self._run_smart_analysis(
                 task_id, repository_url, context, intent, target_languages, 
                 scope, depth, additional_params
             )
-        )
-        self.active_tasks[task_id] = analysis_task
-        
-        try:
-            await analysis_task
-        except asyncio.CancelledError:
-            logger.info(f"Smart analysis task {task_id} was cancelled")
-        except Exception as e:
-            logger.error(f"Smart analysis task {task_id} failed: {e}")
-        finally:
-            # Cleanup
-            if task_id in self.active_tasks:
-                del self.active_tasks[task_id]
     
     async def _run_legacy_analysis(
         self, 
@@ -187,8 +272,14 @@ class AnalysisService:
                 "task_type": task_type
             })
             
-            # Run the analysis with real-time updates based on task type
-            last_progress = 0
+            # Per-run state shared with the update handlers
+            state = {
+                "task_id": task_id,
+                "task_type": task_type,
+                "last_progress": 0,
+                "last_step": None,
+                "last_partial": None,
+            }
             
             # Choose analysis method based on task type
             if task_type == "dependency-audit":
@@ -202,90 +293,108 @@ class AnalysisService:
                 # Standard analysis workflow (PR creation only available in dependency-audit mode)
                 analysis_method = self.whisper_agent.analyze_repository(repository_url)
             
+            # Dispatch on update type; a handler returns True when the run is finished
+            handlers = {
+                "progress": self._on_progress,
+                "insight_chunk": self._on_insight_chunk,
+                "completed": self._on_completed,
+            }
+            
+            get_handler = handlers.get
             async for update in analysis_method:
-                if update["type"] == "progress":
-                    current_progress = update["progress"]
-                    current_step = update["current_step"]
-                    
-                    # Add intermediate progress updates for smoother experience
-                    if current_progress > last_progress + 10:  # If jump is > 10%, add intermediate steps
-                        intermediate_steps = int((current_progress - last_progress) / 5)  # 5% increments
-                        for i in range(1, intermediate_steps):
-                            intermediate_progress = last_progress + (i * 5)
-                            if intermediate_progress < current_progress:
-                                await self.send_message(task_id, {
-                                    "type": "task.progress",
-                                    "task_id": task_id,
-                                    "current_step": f"{current_step} ({intermediate_progress:.0f}%)",
-                                    "progress": intermediate_progress,
-                                    "partial_results": update.get("partial_results", {})
-                                })
-                                # Small delay to make progress feel more natural
-                                await asyncio.sleep(0.2)
-                    
-                    # Send the actual progress update
-                    await self.send_message(task_id, {
-                        "type": "task.progress",
-                        "task_id": task_id,
-                        "current_step": current_step,
-                        "progress": current_progress,
-                        "partial_results": update.get("partial_results", {})
-                    })
-                    
-                    last_progress = current_progress
-                
-
-                elif update["type"] == "completed":
-                    # Send final results (traditional workflow or dependency audit)
-                    results = update["results"]
-                    
-                    # Handle dependency audit results differently
-                    if task_type == "dependency-audit":
-                        detailed_results = {
-                            "dependency_audit": {
-                                "summary": results.get("summary", "Audit completed"),
-                                "vulnerability_scan": results.get("vulnerability_scan", {}),
-                                "github_pr": results.get("github_pr", {}),
-                                "dependencies": results.get("dependencies", {}),
-                                "primary_language": results.get("primary_language", "Unknown")
-                            }
-                        }
-                        
-                        # Also include vulnerability scan results in the main results for the frontend
-                        if results.get("vulnerability_scan"):
-                            detailed_results["vulnerability_scanner"] = results["vulnerability_scan"]
-                    else:
-                        # Traditional analysis results
-                        detailed_results = {
-                            "whisper_analysis": {
-                                "analysis": results.get("architectural_insights", ""),
-                                "file_structure": results.get("file_structure", {}),
-                                "language_analysis": results.get("language_analysis", {}),
-                                "architecture_patterns": results.get("architecture_patterns", []),
-                                "main_components": results.get("main_components", []),
-                                "dependencies": results.get("dependencies", {})
-                            }
-                        }
-                    
-                    await self.send_message(task_id, {
-                        "type": "task.completed",
-                        "task_id": task_id,
-                        "results": {
-                            "summary": self._generate_summary(results),
-                            "statistics": self._generate_statistics(results),
-                            "detailed_results": detailed_results
-                        }
-                    })
+                handler = get_handler(update["type"])
+                if handler is not None and await handler(update, state):
                     break
         
         except Exception as e:
-            logger.error(f"Legacy analysis failed for task {task_id}: {e}")
+            logger.error("Legacy analysis failed for task %s: %s", task_id, e)
             await self.send_message(task_id, {
                 "type": "task.error",
                 "task_id": task_id,
                 "error": f"Analysis failed: {str(e)}"
             })
     
+    async def _on_progress(self, update: Dict[str, Any], state: Dict[str, Any]) -> bool:
+        """Forward an agent progress update, skipping exact repeats of the previous one."""
+        current_progress = update["progress"]
+        current_step = update["current_step"]
+        partial_results = update.get("partial_results", _EMPTY_DICT)
+        
+        if (
+            current_progress == state["last_progress"]
+            and current_step == state["last_step"]
+            and partial_results == state["last_partial"]
+        ):
+            return False
+        
+        progress_msg: ProgressMessage = {
+            "type": "task.progress",
+            "task_id": state["task_id"],
+            "current_step": current_step,
+            "progress": current_progress,
+            # Lets the client animate from the last value (no server-side smoothing)
+            "previous_progress": state["last_progress"],
+            "partial_results": partial_results
+        }
+        await self.send_message(state["task_id"], progress_msg)
+        state["last_progress"] = current_progress
+        state["last_step"] = current_step
+        state["last_partial"] = partial_results
+        return False
+    
+    async def _on_insight_chunk(self, update: Dict[str, Any], state: Dict[str, Any]) -> bool:
+        """Stream architectural insights to the client as they are generated."""
+        await self.send_message(state["task_id"], {
+            "type": "task.insight_chunk",
+            "task_id": state["task_id"],
+            "delta": update["delta"]
+        })
+        return False
+    
+    async def _on_completed(self, update: Dict[str, Any], state: Dict[str, Any]) -> bool:
+        """Send final results (traditional workflow or dependency audit)."""
+        results = update["results"]
+        
+        # Handle dependency audit results differently
+        if state["task_type"] == "dependency-audit":
+            detailed_results = {
+                "dependency_audit": {
+                    "summary": results.get("summary", "Audit completed"),
+                    "vulnerability_scan": results.get("vulnerability_scan", {}),
+                    "github_pr": results.get("github_pr", {}),
+                    "dependencies": results.get("dependencies", {}),
+                    "primary_language": results.get("primary_language", "Unknown")
+                }
+            }
+            
+            # Also include vulnerability scan results in the main results for the frontend
+            if results.get("vulnerability_scan"):
+                detailed_results["vulnerability_scanner"] = results["vulnerability_scan"]
+        else:
+            # Traditional analysis results
+            detailed_results = {
+                "whisper_analysis": {
+                    "analysis": results.get("architectural_insights", ""),
+                    "file_structure": results.get("file_structure", {}),
+                    "language_analysis": results.get("language_analysis", {}),
+                    "architecture_patterns": results.get("architecture_patterns", []),
+                    "main_components": results.get("main_components", []),
+                    "dependencies": results.get("dependencies", {})
+                }
+            }
+        
+        summary, statistics = self._summarize(results)
+        await self.send_message(state["task_id"], {
+            "type": "task.completed",
+            "task_id": state["task_id"],
+            "results": {
+                "summary": summary,
+                "statistics": statistics,
+                "detailed_results": detailed_results
+            }
+        })
+        return True
+    
     async def _run_smart_analysis(
         self,
         task_id: str,
@@ -325,58 +434,54 @@ class AnalysisService:
                 additional_params["depth"] = depth
             
             # Run smart analysis with real-time updates
+            send = self.send_message
             async for update in self.smart_agent.analyze_repository(
                 repository_url, context, additional_params
             ):
                 # Forward all updates to the client
                 update["task_id"] = task_id
-                await self.send_message(task_id, update)
+                await send(task_id, update)
                 
                 # Break on completion or error
                 if update["type"] in ["completed", "error"]:
                     break
         
         except Exception as e:
-            logger.error(f"Smart analysis failed for task {task_id}: {e}")
+            logger.error("Smart analysis failed for task %s: %s", task_id, e)
             await self.send_message(task_id, {
                 "type": "task.error",
                 "task_id": task_id,
                 "error": f"Smart analysis failed: {str(e)}"
             })
     
-    def _generate_summary(self, results: Dict[str, Any]) -> str:
-        """Generate a summary from the analysis results."""
-        lang_analysis = results.get("language_analysis", {})
-        file_structure = results.get("file_structure", {})
-        patterns = results.get("architecture_patterns", [])
+    def _summarize(self, results: Dict[str, Any]) -> Tuple[str, Dict[str, int]]:
+        """Generate the summary line and statistics from the analysis results in one pass."""
+        # Missing sections default to {}; lists are only len()'d, sliced or tested for truth
+        results_get = results.get
+        lang_analysis, file_structure, components, patterns, dependencies = (
+            results_get(key, _EMPTY_DICT) for key in _SUMMARY_KEYS
+        )
         
         primary_lang = lang_analysis.get("primary_language", "Unknown")
-        total_files = file_structure.get("total_files", 0)
-        total_lines = file_structure.get("total_lines", 0)
+        fs_get = file_structure.get
+        total_files = fs_get("total_files", 0)
+        total_lines = fs_get("total_lines", 0)
         
         summary = f"Analysis complete for {primary_lang} project with {total_files} files ({total_lines:,} lines of code)"
         
         if patterns:
             summary += f". Detected architectural patterns: {', '.join(patterns[:3])}"
         
-        return summary
-    
-    def _generate_statistics(self, results: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate statistics from the analysis results."""
-        lang_analysis = results.get("language_analysis", {})
-        file_structure = results.get("file_structure", {})
-        components = results.get("main_components", [])
-        patterns = results.get("architecture_patterns", [])
-        dependencies = results.get("dependencies", {})
-        
-        return {
-            "Files Analyzed": file_structure.get("total_files", 0),
-            "Lines of Code": file_structure.get("total_lines", 0),
+        statistics = {
+            "Files Analyzed": total_files,
+            "Lines of Code": total_lines,
             "Languages Detected": len(lang_analysis.get("languages", {})),
             "Main Components": len(components),
             "Architecture Patterns": len(patterns),
             "Dependency Groups": len(dependencies)
         }
+        
+        return summary, statistics
     
     def get_task_status(self, task_id: str) -> Dict[str, Any]:
         """Get the status of a specific task."""
@@ -403,7 +508,7 @@ class AnalysisService:
             registry = await get_tool_registry()
             return registry.get_registry_info()
         except Exception as e:
-            logger.error(f"Failed to get tool registry info: {e}")
+            logger.error("Failed to get tool registry info: %s", e)
             return {
                 "total_tools": 0,
                 "healthy_tools": 0,
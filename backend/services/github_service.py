@@ -36,7 +36,7 @@ except ImportError as e:
     class Repo: pass
     class GitCommandError(Exception): pass
 
-from config.github_config import GitHubConfig, github_config
+from config.github_config import GitHubConfig, load_github_config
 from utils.go_mod_parser import DependencyUpdate
 from utils.logging_config import get_logger
 
@@ -77,7 +77,7 @@ class GitHubService:
     """
     
     def __init__(self, config: Optional[GitHubConfig] = None):
-        self.config = config or github_config
+        self.config = config or load_github_config()
         self.temp_dirs_to_cleanup = []
         
         # Check if dependencies are available
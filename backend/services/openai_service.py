@@ -14,6 +14,15 @@ class OpenAIService:
     def __init__(self):
         self.api_key = os.getenv('OPENAI_API_KEY')
         self.base_url = "https://api.openai.com/v1"
+        # One pooled client so repeat calls reuse the TLS connection
+        self._client = httpx.AsyncClient(
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=50)
+        )
+    
+    async def aclose(self):
+        """Close the underlying HTTP client."""
+        await self._client.aclose()
         
     async def analyze_intent(self, context: str, repository: str, max_tokens: int = 200) -> AIAnalysis:
         """Analyze user intent using OpenAI API."""
@@ -22,45 +31,43 @@ class OpenAIService:
             return self._simple_fallback_analysis(context)
             
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": "gpt-3.5-turbo",
-                        "messages": [
-                            {
-                                "role": "system",
-                                "content": self._get_system_prompt()
-                            },
-                            {
-                                "role": "user", 
-                                "content": f"Repository: {repository}\n\nUser request: \"{context}\"\n\nAnalyze this request and return the JSON response."
-                            }
-                        ],
-                        "max_tokens": max_tokens,
-                        "temperature": 0.3
-                    },
-                    timeout=30.0
-                )
+            response = await self._client.post(
+                f"{self.base_url}/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": "gpt-3.5-turbo",
+                    "messages": [
+                        {
+                            "role": "system",
+                            "content": self._get_system_prompt()
+                        },
+                        {
+                            "role": "user", 
+                            "content": f"Repository: {repository}\n\nUser request: \"{context}\"\n\nAnalyze this request and return the JSON response."
+                        }
+                    ],
+                    "max_tokens": max_tokens,
+                    "temperature": 0.3
+                },
+            )
+            
+            if response.status_code != 200:
+                raise Exception(f"OpenAI API error: {response.status_code}")
                 
-                if response.status_code != 200:
-                    raise Exception(f"OpenAI API error: {response.status_code}")
-                    
-                response_data = response.json()
-                ai_response = response_data["choices"][0]["message"]["content"]
+            response_data = response.json()
+            ai_response = response_data["choices"][0]["message"]["content"]
+            
+            try:
+                # Parse the AI response as JSON
+                analysis_data = json.loads(ai_response)
+                return AIAnalysis(**analysis_data)
+            except (json.JSONDecodeError, KeyError, TypeError):
+                # Fallback if AI response is malformed
+                return self._simple_fallback_analysis(context)
                 
-                try:
-                    # Parse the AI response as JSON
-                    analysis_data = json.loads(ai_response)
-                    return AIAnalysis(**analysis_data)
-                except (json.JSONDecodeError, KeyError, TypeError):
-                    # Fallback if AI response is malformed
-                    return self._simple_fallback_analysis(context)
-                    
         except Exception as e:
             print(f"OpenAI API call failed: {e}")
             return self._simple_fallback_analysis(context)
@@ -115,13 +122,13 @@ Critical Rules:
 8. Always mention specific tools in recommendations when multiple intents detected"""
 
     def _simple_fallback_analysis(self, context: str) -> AIAnalysis:
-        """Fallback analysis when OpenAI API is not available."""
+        """Fallback analysis when OpenAI API is not available (trusted data, built with model_construct)."""
         context_lower = context.lower()
         intents = []
 
         # Check for Security Analysis
         if any(keyword in context_lower for keyword in ['security', 'vulnerabilit', 'exploit', 'threat']):
-            intents.append(DetectedIntent(
+            intents.append(DetectedIntent.model_construct(
                 type="Security Analysis",
                 confidence=0.8,
                 keywords=['security', 'vulnerability', 'exploit', 'threat'],
@@ -130,7 +137,7 @@ Critical Rules:
 
         # Check for Performance Analysis
         if any(keyword in context_lower for keyword in ['performance', 'optimization', 'speed', 'memory', 'bottleneck']):
-            intents.append(DetectedIntent(
+            intents.append(DetectedIntent.model_construct(
                 type="Performance Analysis",
                 confidence=0.8,
                 keywords=['performance', 'optimization', 'speed', 'memory'],
@@ -139,7 +146,7 @@ Critical Rules:
 
         # Check for Architecture/Exploration Analysis
         if any(keyword in context_lower for keyword in ['explore', 'architecture', 'codebase', 'structure', 'overview', 'understand']):
-            intents.append(DetectedIntent(
+            intents.append(DetectedIntent.model_construct(
                 type="Architecture Analysis",
                 confidence=0.8,
                 keywords=['explore', 'architecture', 'codebase', 'structure'],
@@ -148,7 +155,7 @@ Critical Rules:
 
         # Check for Code Quality Review
         if any(keyword in context_lower for keyword in ['bug', 'quality', 'best practice', 'code smell']):
-            intents.append(DetectedIntent(
+            intents.append(DetectedIntent.model_construct(
                 type="Code Quality Review",
                 confidence=0.7,
                 keywords=['bug', 'quality', 'best practice'],
@@ -157,7 +164,7 @@ Critical Rules:
 
         # Check for Documentation Review
         if any(keyword in context_lower for keyword in ['documentation', 'comment', 'doc']):
-            intents.append(DetectedIntent(
+            intents.append(DetectedIntent.model_construct(
                 type="Documentation Review",
                 confidence=0.7,
                 keywords=['documentation', 'comment', 'doc'],
@@ -166,7 +173,7 @@ Critical Rules:
 
         # Default if no specific intents detected
         if not intents:
-            intents.append(DetectedIntent(
+            intents.append(DetectedIntent.model_construct(
                 type="General Analysis",
                 confidence=0.5,
                 keywords=[],
@@ -195,10 +202,11 @@ Critical Rules:
         else:
             recommendation = f"Single {intents[0].type.lower()} detected. Focused analysis recommended using specialized tools."
 
-        return AIAnalysis(
+        # Built from constants above, so skip validation
+        return AIAnalysis.model_construct(
             intents=intents,
             complexity='complex' if len(intents) > 2 else 'moderate' if len(intents) > 1 else 'simple',
             recommendation=recommendation,
             estimatedTime='20-35 min' if len(intents) > 2 else '15-25 min' if len(intents) > 1 else '10-15 min',
             suggestedApproach='comprehensive' if len(intents) > 1 else 'single_analysis'
-        ) 
\ No newline at end of file
+        )
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for ContextAnalyzer intent parsing
+"""
+
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from core.context_analyzer import AnalysisAction, ContextAnalyzer, ParsedIntent
+
+
+@pytest.fixture
+def analyzer():
+    return ContextAnalyzer()
+
+
+@pytest.mark.asyncio
+async def test_ai_intent_is_used_and_cached(analyzer, monkeypatch):
+    calls = []
+
+    async def fake_ai(context_text):
+        calls.append(context_text)
+        return ParsedIntent(
+            actions=[AnalysisAction("find_vulnerabilities", 0.9, 1, "asked for security")],
+            overall_confidence=0.9,
+            analysis_complexity="simple",
+            reasoning="security request"
+        )
+
+    monkeypatch.setattr(analyzer, "_parse_intent_with_ai", fake_ai)
+
+    context = await analyzer.analyze_context("check go.mod for security issues", "https://github.com/octo/one")
+    parsed = await analyzer._parse_intent("check go.mod for security issues")
+
+    assert context.intent == "find_vulnerabilities"
+    assert context.specific_files == ["go.mod"]
+    assert parsed.actions[0].intent == "find_vulnerabilities"
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_fallback_intent_is_not_cached(analyzer, monkeypatch):
+    calls = []
+
+    async def failing_ai(context_text):
+        calls.append(context_text)
+        return None
+
+    monkeypatch.setattr(analyzer, "_parse_intent_with_ai", failing_ai)
+
+    first = await analyzer._parse_intent("explore this repo")
+    await analyzer._parse_intent("explore this repo")
+
+    assert first.actions[0].intent == "explore"
+    assert len(calls) == 2
@@ -3,12 +3,72 @@
 Comprehensive Test Suite for GitHub PR Integration
 """
 
+import io
 import os
 import sys
 import requests
-import json
+import threading
 import time
-from typing import Dict, Any, Optional
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# orjson is a backend dependency; fall back to the stdlib when running standalone
+try:
+    import orjson
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:
+    import json
+    _loads = json.loads
+    _dumps = lambda obj: json.dumps(obj).encode()
+
+# Backend modules are imported once; tests re-raise the stored error if one failed
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+_IMPORT_ERRORS: Dict[str, Exception] = {}
+
+try:
+    from services.github_service import github_service, GitHubService, GITHUB_AVAILABLE, GIT_AVAILABLE
+    from config.github_config import load_github_config
+except ImportError as e:
+    _IMPORT_ERRORS["github_service"] = e
+
+try:
+    from services.dependency_updater import DependencyUpdater
+except ImportError as e:
+    _IMPORT_ERRORS["dependency_updater"] = e
+
+try:
+    from utils.go_mod_parser import GoModParser
+except ImportError as e:
+    _IMPORT_ERRORS["go_mod_parser"] = e
+
+def _require(*names: str):
+    """Raise the import error recorded for any of the given backend modules"""
+    for name in names:
+        if name in _IMPORT_ERRORS:
+            raise _IMPORT_ERRORS[name]
+
+# Environment snapshot taken once at import
+GITHUB_TOKEN: Optional[str] = os.environ.get("GITHUB_TOKEN")
+
+@contextmanager
+def _env_override(name: str, value: str):
+    """Temporarily set an environment variable, restoring its previous value on exit"""
+    previous = os.environ.get(name)
+    os.environ[name] = value
+    try:
+        yield
+    finally:
+        if previous is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = previous
 
 # Colors for output
 class Colors:
@@ -21,18 +81,43 @@ class Colors:
     BOLD = '\033[1m'
     END = '\033[0m'
 
+# Escape codes are resolved once; piped output and NO_COLOR get plain text
+_USE_COLOR = sys.stdout.isatty() and os.environ.get("NO_COLOR") is None
+_END = Colors.END if _USE_COLOR else ""
+_PASS = f"{Colors.GREEN}✓ " if _USE_COLOR else "✓ "
+_FAIL = f"{Colors.RED}✗ " if _USE_COLOR else "✗ "
+_STEP_PREFIXES = {
+    status: (f"{color}[{status}]{_END} " if _USE_COLOR else f"[{status}] ")
+    for status, color in (("INFO", Colors.CYAN), ("PASS", Colors.GREEN), ("FAIL", Colors.RED))
+}
+
 def print_step(step: str, status: str = "INFO"):
     """Print formatted test step"""
-    color = Colors.CYAN if status == "INFO" else Colors.GREEN if status == "PASS" else Colors.RED
-    print(f"{color}[{status}]{Colors.END} {step}")
+    prefix = _STEP_PREFIXES.get(status)
+    if prefix is None:
+        prefix = f"{Colors.RED}[{status}]{_END} " if _USE_COLOR else f"[{status}] "
+    sys.stdout.write(prefix + step + "\n")
 
 def print_result(test_name: str, passed: bool, details: str = ""):
     """Print test result"""
-    status = "PASS" if passed else "FAIL"
-    color = Colors.GREEN if passed else Colors.RED
-    print(f"{color}✓ {test_name}{Colors.END}" if passed else f"{color}✗ {test_name}{Colors.END}")
+    line = (_PASS if passed else _FAIL) + test_name + _END + "\n"
     if details:
-        print(f"    {details}")
+        line += f"    {details}\n"
+    sys.stdout.write(line)
+
+class _ThreadOutput(io.TextIOBase):
+    """sys.stdout stand-in that buffers writes per worker thread"""
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+    
+    def write(self, text: str) -> int:
+        buffer = getattr(self.local, "buffer", None)
+        return (buffer or self.stream).write(text)
+    
+    def flush(self):
+        self.stream.flush()
 
 class GitHubIntegrationTester:
     """Test suite for GitHub PR integration"""
@@ -43,47 +128,123 @@ class GitHubIntegrationTester:
             "total": 0,
             "passed": 0,
             "failed": 0,
-            "tests": []
+            "tests": [],
+            "by_name": {}  # test name -> passed
         }
+        
+        # One keep-alive session for every HTTP test
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=Retry(total=2, backoff_factor=0.1, status_forcelist=[502, 503, 504])
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        # GET responses reused within one suite run: path -> (fetched_at, response)
+        self._get_cache: Dict[str, Tuple[float, requests.Response]] = {}
+        # Liveness endpoint found by the first successful health check
+        self._health_path: Optional[str] = None
     
-    def run_test(self, test_name: str, test_func) -> bool:
-        """Run a single test and record results"""
-        self.results["total"] += 1
+    def _cached_get(self, path: str, timeout: float = 10, ttl: float = 30) -> requests.Response:
+        """GET a backend path, reusing a response fetched less than ttl seconds ago"""
+        now = time.monotonic()
+        cached = self._get_cache.get(path)
+        if cached and now - cached[0] < ttl:
+            return cached[1]
+        
+        headers = {}
+        etag = cached[1].headers.get("ETag") if cached else None
+        if etag:
+            headers["If-None-Match"] = etag
+        response = self.session.get(f"{self.base_url}{path}", headers=headers, timeout=timeout)
+        if response.status_code == 304 and cached:
+            # Unchanged since the last fetch; keep serving the stored body
+            response = cached[1]
+        self._get_cache[path] = (now, response)
+        return response
+    
+    def close(self):
+        """Release pooled HTTP connections"""
+        self.session.close()
+    
+    def _run_one(self, test_name: str, test_func) -> Dict[str, Any]:
+        """Run a single test and return its record without printing the result"""
+        out = sys.stdout
+        buffer = io.StringIO()
+        capturing = isinstance(out, _ThreadOutput)
+        if capturing:
+            out.local.buffer = buffer
+        record = {"name": test_name}
         try:
-            result = test_func()
-            if result:
-                self.results["passed"] += 1
-                print_result(test_name, True)
-            else:
-                self.results["failed"] += 1
-                print_result(test_name, False)
-            self.results["tests"].append({"name": test_name, "passed": result})
-            return result
+            record["passed"] = bool(test_func())
         except Exception as e:
+            record["passed"] = False
+            record["error"] = str(e)
+        finally:
+            if capturing:
+                out.local.buffer = None
+        record["output"] = buffer.getvalue()
+        return record
+    
+    def _record(self, record: Dict[str, Any]) -> bool:
+        """Add a test record to the results and print it"""
+        self.results["total"] += 1
+        if record["output"]:
+            print(record["output"], end="")
+        if record["passed"]:
+            self.results["passed"] += 1
+            print_result(record["name"], True)
+        else:
             self.results["failed"] += 1
-            print_result(test_name, False, f"Exception: {str(e)}")
-            self.results["tests"].append({"name": test_name, "passed": False, "error": str(e)})
-            return False
+            details = f"Exception: {record['error']}" if "error" in record else ""
+            print_result(record["name"], False, details)
+        self.results["tests"].append({k: v for k, v in record.items() if k != "output"})
+        self.results["by_name"][record["name"]] = record["passed"]
+        return record["passed"]
+    
+    def run_test(self, test_name: str, test_func) -> bool:
+        """Run a single test and record results"""
+        return self._record(self._run_one(test_name, test_func))
+    
+    def run_tests_parallel(self, tests: List[Tuple[str, Callable[[], bool]]], max_workers: int = 8) -> Dict[str, Dict[str, Any]]:
+        """Run independent tests concurrently; returns unrecorded results by test name"""
+        real_stdout = sys.stdout
+        sys.stdout = _ThreadOutput(real_stdout)
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {name: executor.submit(self._run_one, name, func) for name, func in tests}
+            return {name: future.result() for name, future in futures.items()}
+        finally:
+            sys.stdout = real_stdout
     
     def test_server_health(self) -> bool:
         """Test if the server is running"""
-        try:
-            response = requests.get(f"{self.base_url}/health", timeout=5)
-            return response.status_code == 200
-        except:
+        if self._health_path:
             try:
-                # Try the docs endpoint if health doesn't exist
-                response = requests.get(f"{self.base_url}/docs", timeout=5)
-                return response.status_code == 200
-            except:
+                return self._cached_get(self._health_path, timeout=5).status_code == 200
+            except requests.RequestException:
                 return False
+        
+        # Fall back to the docs endpoint if health doesn't exist
+        for candidate in ("/health", "/docs"):
+            try:
+                response = self._cached_get(candidate, timeout=5)
+            except requests.RequestException:
+                continue
+            if response.status_code == 200:
+                self._health_path = candidate
+                return True
+        return False
     
     def test_github_status_endpoint(self) -> bool:
         """Test GitHub status API endpoint"""
         try:
-            response = requests.get(f"{self.base_url}/api/github/status", timeout=10)
+            response = self._cached_get("/api/github/status")
             if response.status_code == 200:
-                data = response.json()
+                data = _loads(response.content)
                 print(f"    GitHub Available: {data.get('available', False)}")
                 print(f"    Authenticated: {data.get('authenticated', False)}")
                 if 'rate_limit_remaining' in data:
@@ -98,9 +259,8 @@ class GitHubIntegrationTester:
         """Test GitHub configuration loading"""
         try:
             # Check if environment variables are set
-            github_token = os.getenv("GITHUB_TOKEN")
-            if github_token:
-                print(f"    GitHub Token: ✓ (starts with {github_token[:10]}...)")
+            if GITHUB_TOKEN:
+                print(f"    GitHub Token: ✓ (starts with {GITHUB_TOKEN[:10]}...)")
                 return True
             else:
                 print("    GitHub Token: ✗ (not set in environment)")
@@ -120,8 +280,7 @@ class GitHubIntegrationTester:
             print("    GitPython: ✓")
             
             # Test our GitHub service
-            sys.path.append('backend')
-            from services.github_service import github_service, GITHUB_AVAILABLE, GIT_AVAILABLE
+            _require("github_service")
             print(f"    GitHub Service Available: {GITHUB_AVAILABLE}")
             print(f"    Git Service Available: {GIT_AVAILABLE}")
             print(f"    Service Initialized: {github_service.is_available()}")
@@ -144,15 +303,14 @@ class GitHubIntegrationTester:
                 }
             }
             
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/api/tasks/",
-                json=payload,
-                headers={"Content-Type": "application/json"},
+                data=_dumps(payload),
                 timeout=10
             )
             
             if response.status_code == 200:
-                data = response.json()
+                data = _loads(response.content)
                 print(f"    Task ID: {data.get('task_id')}")
                 print(f"    GitHub PR Enabled: {data.get('github_pr_enabled', False)}")
                 print(f"    WebSocket URL: {data.get('websocket_url', 'N/A')}")
@@ -167,8 +325,7 @@ class GitHubIntegrationTester:
     def test_go_mod_parser(self) -> bool:
         """Test Go.mod parsing functionality"""
         try:
-            sys.path.append('backend')
-            from utils.go_mod_parser import GoModParser
+            _require("go_mod_parser")
             
             # Create a test go.mod content
             test_content = """module github.com/test/project
@@ -195,9 +352,7 @@ require (
     def test_dependency_updater(self) -> bool:
         """Test dependency vulnerability updating"""
         try:
-            sys.path.append('backend')
-            from services.dependency_updater import DependencyUpdater
-            from utils.go_mod_parser import GoModParser
+            _require("dependency_updater", "go_mod_parser")
             
             # Create test vulnerability data
             vuln_data = {
@@ -240,22 +395,17 @@ require github.com/gin-gonic/gin v1.9.0"""
     def test_dry_run_mode(self) -> bool:
         """Test GitHub PR creation in dry run mode"""
         try:
-            # Set dry run mode
-            os.environ["GITHUB_DRY_RUN"] = "true"
+            _require("github_service")
             
-            sys.path.append('backend')
-            from services.github_service import GitHubService
-            from config.github_config import load_github_config
-            
-            config = load_github_config()
+            with _env_override("GITHUB_DRY_RUN", "true"):
+                load_github_config.cache_clear()  # Re-read the environment set above
+                config = load_github_config()
+            load_github_config.cache_clear()  # Don't leak the dry run config to later callers
             service = GitHubService(config)
             
             print(f"    Dry Run Mode: {config.dry_run_mode}")
             print(f"    Service Available: {service.is_available()}")
             
-            # Reset environment
-            os.environ.pop("GITHUB_DRY_RUN", None)
-            
             return config.dry_run_mode
         except Exception as e:
             print(f"    Error: {e}")
@@ -265,29 +415,30 @@ require github.com/gin-gonic/gin v1.9.0"""
         """Run all tests and print summary"""
         print(f"{Colors.BOLD}{Colors.CYAN}🧪 GitHub PR Integration Test Suite{Colors.END}\n")
         
-        # Basic connectivity tests
-        print(f"{Colors.BOLD}📡 Connectivity Tests{Colors.END}")
-        self.run_test("Server Health Check", self.test_server_health)
-        self.run_test("GitHub Status Endpoint", self.test_github_status_endpoint)
-        print()
-        
-        # Configuration tests
-        print(f"{Colors.BOLD}⚙️ Configuration Tests{Colors.END}")
-        self.run_test("GitHub Token Configuration", self.test_github_config_loading)
-        self.run_test("Import Dependencies", self.test_import_dependencies)
-        self.run_test("Dry Run Mode", self.test_dry_run_mode)
-        print()
+        # Independent tests run concurrently; results are printed per group below
+        records = self.run_tests_parallel([
+            ("Server Health Check", self.test_server_health),
+            ("GitHub Status Endpoint", self.test_github_status_endpoint),
+            ("GitHub Token Configuration", self.test_github_config_loading),
+            ("Import Dependencies", self.test_import_dependencies),
+            ("Go.mod Parser", self.test_go_mod_parser),
+            ("Dependency Updater", self.test_dependency_updater),
+            ("Create Task with PR Options", self.test_create_task_with_pr),
+        ])
+        # Dry run mode changes os.environ, so it runs on its own afterwards
+        records.update(self.run_tests_parallel([("Dry Run Mode", self.test_dry_run_mode)], max_workers=1))
         
-        # Core functionality tests
-        print(f"{Colors.BOLD}🔧 Core Functionality Tests{Colors.END}")
-        self.run_test("Go.mod Parser", self.test_go_mod_parser)
-        self.run_test("Dependency Updater", self.test_dependency_updater)
-        print()
-        
-        # API integration tests
-        print(f"{Colors.BOLD}🌐 API Integration Tests{Colors.END}")
-        self.run_test("Create Task with PR Options", self.test_create_task_with_pr)
-        print()
+        groups = [
+            ("📡 Connectivity Tests", ["Server Health Check", "GitHub Status Endpoint"]),
+            ("⚙️ Configuration Tests", ["GitHub Token Configuration", "Import Dependencies", "Dry Run Mode"]),
+            ("🔧 Core Functionality Tests", ["Go.mod Parser", "Dependency Updater"]),
+            ("🌐 API Integration Tests", ["Create Task with PR Options"]),
+        ]
+        for title, names in groups:
+            print(f"{Colors.BOLD}{title}{Colors.END}")
+            for name in names:
+                self._record(records[name])
+            print()
         
         # Print summary
         self.print_summary()
@@ -310,14 +461,15 @@ require github.com/gin-gonic/gin v1.9.0"""
         
         # Provide recommendations
         print(f"\n{Colors.BOLD}💡 Recommendations:{Colors.END}")
+        by_name = self.results["by_name"]
         
-        if not any(test["name"] == "GitHub Token Configuration" and test["passed"] for test in self.results["tests"]):
+        if not by_name.get("GitHub Token Configuration"):
             print("• Set GITHUB_TOKEN environment variable with your GitHub token")
         
-        if not any(test["name"] == "Server Health Check" and test["passed"] for test in self.results["tests"]):
+        if not by_name.get("Server Health Check"):
             print("• Start the backend server: python backend/main.py")
         
-        if any(test["name"] == "Import Dependencies" and not test["passed"] for test in self.results["tests"]):
+        if by_name.get("Import Dependencies") is False:
             print("• Install missing dependencies: pip install PyGithub==1.59.1 GitPython==3.1.40")
 
 
@@ -333,13 +485,16 @@ def main():
     
     tester = GitHubIntegrationTester(args.url)
     
-    if args.quick:
-        print("Running quick tests...")
-        tester.run_test("Server Health", tester.test_server_health)
-        tester.run_test("GitHub Status", tester.test_github_status_endpoint)
-        tester.run_test("Dependencies", tester.test_import_dependencies)
-    else:
-        tester.run_all_tests()
+    try:
+        if args.quick:
+            print("Running quick tests...")
+            tester.run_test("Server Health", tester.test_server_health)
+            tester.run_test("GitHub Status", tester.test_github_status_endpoint)
+            tester.run_test("Dependencies", tester.test_import_dependencies)
+        else:
+            tester.run_all_tests()
+    finally:
+        tester.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tests for the WhisperAnalysisAgent progress stream
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from agents.whisper_analysis_agent import WhisperAnalysisAgent
+
+
+class _FakeWorkflow:
+    """Compiled-graph stand-in that publishes from a nested task, as LangGraph nodes do"""
+
+    def __init__(self, agent):
+        self.agent = agent
+
+    async def astream(self, state):
+        url = state["repository_url"]
+
+        async def node():
+            for i in range(3):
+                self.agent._publish("insight_chunk", f"{url}:{i}")
+                await asyncio.sleep(0)
+            self.agent._publish("branch", {**state, "current_step": url, "progress": 50.0})
+
+        await asyncio.create_task(node())
+        yield {"insights": {**state, "current_step": url, "progress": 100.0}}
+
+
+@pytest.fixture
+def agent():
+    return WhisperAnalysisAgent(openai_api_key="test-key")
+
+
+async def _collect(agent, url):
+    return [event async for event in agent.analyze_repository(url)]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_runs_only_receive_their_own_events(agent, monkeypatch):
+    monkeypatch.setattr(agent, "create_workflow", lambda: _FakeWorkflow(agent))
+    urls = ["https://github.com/octo/one", "https://github.com/octo/two"]
+
+    results = await asyncio.gather(*(_collect(agent, url) for url in urls))
+
+    for url, events in zip(urls, results):
+        deltas = [e["delta"] for e in events if e["type"] == "insight_chunk"]
+        steps = [e["current_step"] for e in events if e["type"] == "progress"]
+        assert deltas == [f"{url}:{i}" for i in range(3)]
+        assert steps == [url, url]
+        assert events[-1]["type"] == "completed"
+        assert events[-1]["results"]["repository_url"] == url
+
+
+@pytest.mark.asyncio
+async def test_closing_the_stream_cancels_the_workflow(agent, monkeypatch):
+    cancelled = asyncio.Event()
+
+    class _HangingWorkflow:
+        async def astream(self, state):
+            agent._publish("insight_chunk", "first")
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            yield {}
+
+    monkeypatch.setattr(agent, "create_workflow", lambda: _HangingWorkflow())
+
+    stream = agent.analyze_repository("https://github.com/octo/one")
+    assert await stream.__anext__() == {"type": "insight_chunk", "delta": "first"}
+    await stream.aclose()
+
+    assert cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_workflow_without_node_output_raises(agent, monkeypatch):
+    class _EmptyWorkflow:
+        async def astream(self, state):
+            return
+            yield
+
+    monkeypatch.setattr(agent, "create_workflow", lambda: _EmptyWorkflow())
+
+    with pytest.raises(RuntimeError, match="produced no result"):
+        async for _ in agent.analyze_repository("https://github.com/octo/one"):
+            pass
+
+
+def test_directory_symlinks_are_not_counted_as_files(agent, tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.py").write_text("print('hi')\n")
+    (tmp_path / "linked").symlink_to(tmp_path / "src", target_is_directory=True)
+
+    structure = agent.analyze_file_structure(str(tmp_path))
+
+    assert structure["total_files"] == 1
+    assert "" not in structure["file_types"]
+    assert "linked" in agent._scan_repo_once(str(tmp_path))["directories"]
+
+
+def test_language_counts_skip_vendored_directories(agent, tmp_path):
+    (tmp_path / "index.js").write_text("module.exports = {}\n")
+    (tmp_path / ".eslintrc.js").write_text("module.exports = {}\n")
+    (tmp_path / "node_modules" / "dep").mkdir(parents=True)
+    (tmp_path / "node_modules" / "dep" / "index.js").write_text("module.exports = {}\n")
+    (tmp_path / "build").mkdir()
+    (tmp_path / "build" / "main.py").write_text("pass\n")
+
+    languages = agent.detect_languages_and_frameworks(str(tmp_path))
+
+    assert languages["languages"] == {"JavaScript": 2}
+
+
+def test_total_lines_count_an_unterminated_last_line(agent, tmp_path):
+    (tmp_path / "a.py").write_text("x = 1\ny = 2")
+    (tmp_path / "b.py").write_text("z = 3\n")
+
+    structure = agent.analyze_file_structure(str(tmp_path))
+
+    assert structure["total_lines"] == 3
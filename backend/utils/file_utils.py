@@ -4,17 +4,41 @@ File utility functions for repository analysis.
 
 import os
 import stat
-import shutil
+import sys
 import tempfile
 import subprocess
 import time
-from pathlib import Path
-from typing import Optional
 
 def create_temp_directory(prefix: str = "whisper_") -> str:
     """Create a temporary directory for analysis."""
     return tempfile.mkdtemp(prefix=prefix)
 
+def _exists(path: str) -> bool:
+    """Check whether a path exists without following symlinks."""
+    try:
+        os.lstat(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+def _remove_writable(remove, path: str):
+    """Remove a path, making it writable first if it is read-only (Windows)."""
+    try:
+        remove(path)
+    except PermissionError:
+        os.chmod(path, stat.S_IWRITE)
+        remove(path)
+
+def _rm_tree(path: str):
+    """Recursively delete a directory tree without following symlinks."""
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                _rm_tree(entry.path)
+            else:
+                _remove_writable(os.unlink, entry.path)
+    _remove_writable(os.rmdir, path)
+
 def cleanup_directory(directory_path: str) -> bool:
     """
     Safely clean up a directory, handling Windows read-only files.
@@ -25,96 +49,58 @@ def cleanup_directory(directory_path: str) -> bool:
     Returns:
         bool: True if cleanup was successful, False otherwise
     """
-    if not os.path.exists(directory_path):
+    try:
+        st = os.lstat(directory_path)
+    except FileNotFoundError:
         return True
     
-    def handle_remove_readonly(func, path, exc):
-        """Handle read-only files on Windows."""
+    # A symlinked root is removed as a link; never delete through it
+    if stat.S_ISLNK(st.st_mode):
         try:
-            # Make the file/directory writable
-            os.chmod(path, stat.S_IWRITE)
-            # For directories, also make all contents writable
-            if os.path.isdir(path):
-                for root, dirs, files in os.walk(path):
-                    for d in dirs:
-                        try:
-                            os.chmod(os.path.join(root, d), stat.S_IWRITE)
-                        except:
-                            pass
-                    for f in files:
-                        try:
-                            os.chmod(os.path.join(root, f), stat.S_IWRITE)
-                        except:
-                            pass
-            func(path)
-        except Exception:
-            pass
-    
-    # Method 1: Try shutil.rmtree with error handler
-    try:
-        shutil.rmtree(directory_path, onerror=handle_remove_readonly)
-        if not os.path.exists(directory_path):
+            os.unlink(directory_path)
             return True
-    except Exception:
-        pass
+        except OSError:
+            return False
     
-    # Method 2: Try to make everything writable first, then delete
+    # Method 1: Single scandir pass; only chmod entries that refuse removal
     try:
-        for root, dirs, files in os.walk(directory_path):
-            for d in dirs:
-                try:
-                    os.chmod(os.path.join(root, d), stat.S_IWRITE)
-                except:
-                    pass
-            for f in files:
-                try:
-                    os.chmod(os.path.join(root, f), stat.S_IWRITE)
-                except:
-                    pass
-        
-        # Small delay to let Windows release file handles
-        time.sleep(0.1)
-        shutil.rmtree(directory_path)
+        _rm_tree(directory_path)
         return True
     except Exception:
         pass
     
-    # Method 3: Try Windows-specific rmdir command
-    try:
-        result = subprocess.run(['rmdir', '/s', '/q', directory_path], 
-                              shell=True, check=False, capture_output=True, text=True)
-        if not os.path.exists(directory_path):
-            return True
-    except Exception:
-        pass
-    
-    # Method 4: Try PowerShell Remove-Item (more powerful than rmdir)
-    try:
-        ps_command = f'Remove-Item -Path "{directory_path}" -Recurse -Force -ErrorAction SilentlyContinue'
-        result = subprocess.run(['powershell', '-Command', ps_command], 
-                              check=False, capture_output=True, text=True)
-        if not os.path.exists(directory_path):
-            return True
-    except Exception:
-        pass
+    # Method 2 (Windows only): PowerShell Remove-Item, e.g. for handles still open
+    if sys.platform == 'win32':
+        try:
+            # Small delay to let Windows release file handles
+            time.sleep(0.1)
+            ps_command = f'Remove-Item -Path "{directory_path}" -Recurse -Force -ErrorAction SilentlyContinue'
+            subprocess.run(['powershell', '-Command', ps_command],
+                           check=False, capture_output=True, text=True)
+            if not _exists(directory_path):
+                return True
+        except Exception:
+            pass
     
     # If all methods fail, return False but don't crash
     return False
 
+# Extensions treated as text by is_text_file
+_TEXT_EXTS = frozenset({
+    '.py', '.js', '.ts', '.jsx', '.tsx', '.html', '.css', '.scss', '.sass',
+    '.json', '.xml', '.yaml', '.yml', '.toml', '.ini', '.cfg', '.conf',
+    '.txt', '.md', '.rst', '.tex', '.csv', '.sql', '.sh', '.bat', '.ps1',
+    '.php', '.rb', '.go', '.rs', '.cpp', '.c', '.h', '.hpp', '.cs', '.java',
+    '.kt', '.swift', '.dart', '.vue', '.svelte', '.r', '.m', '.scala'
+})
+
 def get_file_extension(file_path: str) -> str:
     """Get the file extension from a file path."""
-    return Path(file_path).suffix.lower()
+    return os.path.splitext(file_path)[1].lower()
 
 def is_text_file(file_path: str) -> bool:
     """Check if a file is likely a text file based on its extension."""
-    text_extensions = {
-        '.py', '.js', '.ts', '.jsx', '.tsx', '.html', '.css', '.scss', '.sass',
-        '.json', '.xml', '.yaml', '.yml', '.toml', '.ini', '.cfg', '.conf',
-        '.txt', '.md', '.rst', '.tex', '.csv', '.sql', '.sh', '.bat', '.ps1',
-        '.php', '.rb', '.go', '.rs', '.cpp', '.c', '.h', '.hpp', '.cs', '.java',
-        '.kt', '.swift', '.dart', '.vue', '.svelte', '.r', '.m', '.scala'
-    }
-    return get_file_extension(file_path) in text_extensions
+    return os.path.splitext(file_path)[1].lower() in _TEXT_EXTS
 
 def get_file_size(file_path: str) -> int:
     """Get file size in bytes."""
@@ -124,9 +110,32 @@ def get_file_size(file_path: str) -> int:
         return 0
 
 def count_lines_in_file(file_path: str) -> int:
-    """Count the number of lines in a text file."""
+    """
+    Count the number of lines in a text file.
+    
+    A final line without a trailing newline still counts. Files that look
+    binary (a NUL byte in the first 512 bytes) count as 0 lines.
+    
+    Args:
+        file_path: Path to the file
+        
+    Returns:
+        Number of lines, or 0 if the file can't be read
+    """
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            return sum(1 for _ in f)
-    except Exception:
-        return 0 
\ No newline at end of file
+        lines = 0
+        # Count newline bytes in raw 1 MiB chunks; no decoding or per-line objects
+        with open(file_path, 'rb', buffering=0) as f:
+            chunk = f.read(1 << 20)
+            if b'\x00' in chunk[:512]:
+                return 0
+            last = chunk
+            while chunk:
+                lines += chunk.count(b'\n')
+                last = chunk
+                chunk = f.read(1 << 20)
+        if last and not last.endswith(b'\n'):
+            lines += 1
+        return lines
+    except OSError:
+        return 0
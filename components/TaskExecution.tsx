@@ -71,6 +71,13 @@ export default function TaskExecution({ repository, task, onBack }: TaskExecutio
             console.log('WebSocket message:', data);
 
             switch (data.type) {
+              case 'task.queued':
+                setIsConnecting(false);
+                if (data.current_step) {
+                  setCurrentStep(data.current_step);
+                }
+                break;
+
               case 'task.started':
                 setIsConnecting(false);
                 setCurrentStep("Analysis started...");
@@ -17,10 +17,12 @@ export interface TaskResponse {
 }
 
 export interface AnalysisProgress {
-  type: 'task.started' | 'task.progress' | 'task.completed' | 'task.error';
+  type: 'task.queued' | 'task.started' | 'task.progress' | 'task.insight_chunk' | 'task.completed' | 'task.error';
   task_id?: string;
   current_step?: string;
   progress?: number;
+  previous_progress?: number;
+  delta?: string;
   partial_results?: {
     file_structure?: Record<string, unknown>;
     language_analysis?: Record<string, unknown>;
@@ -77,7 +79,7 @@ export interface ToolBatch {
 }
 
 export interface SmartAnalysisProgress {
-  type: 'progress' | 'execution_plan' | 'tool_completed' | 'completed' | 'error';
+  type: 'task.queued' | 'progress' | 'execution_plan' | 'tool_completed' | 'completed' | 'error';
   task_id?: string;
   current_step?: string;
   progress?: number;
@@ -254,8 +256,9 @@ export class WhisperAPI {
 
     ws.onmessage = (event) => {
       try {
-        const data: AnalysisProgress = JSON.parse(event.data);
-        onMessage(data);
+        // The server may coalesce rapid updates into one array frame
+        const payload: AnalysisProgress | AnalysisProgress[] = JSON.parse(event.data);
+        (Array.isArray(payload) ? payload : [payload]).forEach(onMessage);
       } catch (error) {
         console.error('Error parsing WebSocket message:', error);
       }
@@ -295,8 +298,9 @@ export class WhisperAPI {
 
     ws.onmessage = (event) => {
       try {
-        const data: SmartAnalysisProgress = JSON.parse(event.data);
-        onMessage(data);
+        // The server may coalesce rapid updates into one array frame
+        const payload: SmartAnalysisProgress | SmartAnalysisProgress[] = JSON.parse(event.data);
+        (Array.isArray(payload) ? payload : [payload]).forEach(onMessage);
       } catch (error) {
         console.error('Error parsing smart WebSocket message:', error);
       }